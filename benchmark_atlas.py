@@ -0,0 +1,55 @@
+import os
+from time import perf_counter
+
+import pygame
+
+from scripts.core.atlas import pack_atlas
+from scripts.core.constants import SCREEN_SIZE
+from scripts.core.utils import MAP_PATH, get_map_names, load_images, load_map
+
+TILE_TYPES = ['decor', 'grass', 'large_decor', 'spawners', 'stone']
+DURATION = 1  # seconds per run
+RUNS = 3
+
+
+class BenchGame:
+    def __init__(self, assets):
+        self.assets = assets
+
+
+def blit_rate(tilemap, display):
+    """ Tile blits per second drawing every tile of the map, wrapped on the display """
+    tiles = [tile for tile in tilemap.grid_tiles() if tile[0] != ""]
+    blits = len(tiles)
+    frames = 0
+    start = perf_counter()
+    while perf_counter() - start < DURATION:
+        for tile_type, variant, x, y in tiles:
+            display.blit(tilemap.game.assets[tile_type][variant],
+                         (x * tilemap.tile_size % display.get_width(), y * tilemap.tile_size % display.get_height()))
+        frames += 1
+    return blits * frames / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    display = pygame.Surface((SCREEN_SIZE[0] // 1.5, SCREEN_SIZE[1] // 1.5))
+
+    name = max(get_map_names(), key=lambda map_name: os.path.getsize(MAP_PATH + '/' + map_name + '/map.json'))
+    separate = {tile_type: load_images('tiles/' + tile_type) for tile_type in TILE_TYPES}
+    _, subsurfaces = pack_atlas([img for tile_type in TILE_TYPES for img in separate[tile_type]])
+    atlas = {}
+    for tile_type in TILE_TYPES:
+        atlas[tile_type] = subsurfaces[:len(separate[tile_type])]
+        subsurfaces = subsurfaces[len(separate[tile_type]):]
+
+    # Runs are interleaved and the best one is kept, to limit the noise of other processes
+    runs = {'separate surfaces': [], 'atlas subsurfaces': []}
+    tilemaps = {'separate surfaces': load_map(BenchGame(separate), name),
+                'atlas subsurfaces': load_map(BenchGame(atlas), name)}
+    for _ in range(RUNS):
+        for label, tilemap in tilemaps.items():
+            runs[label].append(blit_rate(tilemap, display))
+    for label, rates in runs.items():
+        print(f'{name} {label:<20}{max(rates) / 1000:>10.0f}k blits/s')
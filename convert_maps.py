@@ -0,0 +1,52 @@
+import argparse
+import os
+from time import perf_counter
+
+from scripts.core.tilemap import TileMap
+from scripts.core.utils import MAP_PATH, get_map_names
+
+
+def map_paths(name):
+    return MAP_PATH + '/' + name + '/map.json', MAP_PATH + '/' + name + '/map.bin'
+
+def convert(name):
+    json_path, bin_path = map_paths(name)
+    tilemap = TileMap(None)
+    tilemap.load(json_path)
+    tilemap.save_binary(bin_path)
+    print(f'{name}: {os.path.getsize(json_path) // 1024} KB -> {os.path.getsize(bin_path) // 1024} KB')
+
+def best_time(load, path, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        tilemap = TileMap(None)
+        start = perf_counter()
+        load(tilemap, path)
+        best = min(best, perf_counter() - start)
+    return best
+
+def benchmark(name, repeat):
+    """ Compare the json path used by utils.load_map against the binary one """
+    json_path, bin_path = map_paths(name)
+    if not os.path.exists(bin_path):
+        convert(name)
+    json_time = best_time(TileMap.load, json_path, repeat)
+    bin_time = best_time(TileMap.load_binary, bin_path, repeat)
+    print(f'{name:<16}{json_time * 1000:>10.2f} ms{bin_time * 1000:>10.2f} ms{json_time / bin_time:>8.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert data/maps/*/map.json to the binary map format')
+    parser.add_argument('maps', nargs='*', help='map names, all maps by default')
+    parser.add_argument('--bench', action='store_true', help='benchmark json against binary loading')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    names = args.maps or get_map_names()
+    if args.bench:
+        print(f'{"map":<16}{"json":>13}{"binary":>13}{"speedup":>9}')
+        for name in names:
+            benchmark(name, args.repeat)
+    else:
+        for name in names:
+            convert(name)
@@ -1,7 +1,7 @@
 import sys
 import pygame
 
-from scripts.core.utils import load_images
+from scripts.core.assets import Assets
 from scripts.core.tilemap import TileMap
 from scripts.core.utils import MAP_PATH
 
@@ -29,12 +29,13 @@ class Editor:
         self.clock   = pygame.time.Clock()
 
         self.movement = [False, False, False, False]
+        assets = Assets()
         self.assets = {
-            'grass': load_images('tiles/grass'),
-            'stone': load_images('tiles/stone'),
-            'decor': load_images('tiles/decor'),
-            'large_decor': load_images('tiles/large_decor'),
-            'spawners': load_images('tiles/spawners'),
+            'grass': assets.images('tiles/grass'),
+            'stone': assets.images('tiles/stone'),
+            'decor': assets.images('tiles/decor'),
+            'large_decor': assets.images('tiles/large_decor'),
+            'spawners': assets.images('tiles/spawners'),
         }
 
         self.tilemap = TileMap(self)
@@ -55,6 +56,7 @@ class Editor:
         self.start_mouse_pos = (0, 0)
         self.start_scroll    = (0, 0)
         self.brush_size = 1
+        self.brushed_cells = set()
         self.name = name
 
     def run(self):
@@ -76,22 +78,16 @@ class Editor:
                 if self.on_grid:
                     for i in range(-(self.brush_size // 2), (self.brush_size // 2) + self.brush_size % 2):
                         for j in range(-(self.brush_size // 2), (self.brush_size // 2) + self.brush_size % 2):
-                            self.tilemap.tilemap[str(tile_pos[0] + i) + ';' + str(tile_pos[1] + j)] = {
-                                'type': self.tile_list[self.tile_group],
-                                'variant': self.tile_variant,
-                                'pos': [tile_pos[0] + i, tile_pos[1] + j]
-                            }
+                            self.tilemap.set_tile(tile_pos[0] + i, tile_pos[1] + j,
+                                                  self.tile_list[self.tile_group], self.tile_variant)
+                            self.brushed_cells.add((tile_pos[0] + i, tile_pos[1] + j))
             if self.right_clicking:
                 for i in range(-(self.brush_size // 2), (self.brush_size // 2) + self.brush_size % 2):
                     for j in range(-(self.brush_size // 2), (self.brush_size // 2) + self.brush_size % 2):
-                        tile_loc = str(tile_pos[0] + i) + ';' + str(tile_pos[1] + j)
-                        if tile_loc in self.tilemap.tilemap:
-                            del self.tilemap.tilemap[tile_loc]
-                for tile in self.tilemap.offgrid_tiles.copy():
-                    tile_img = self.assets[tile['type']][tile['variant']]
-                    tile_rect = pygame.Rect(tile['pos'][0] - self.scroll[0], tile['pos'][1] - self.scroll[1], tile_img.get_width(), tile_img.get_height()) 
-                    if tile_rect.collidepoint(mouse_pos):
-                        self.tilemap.offgrid_tiles.remove(tile)
+                        if self.tilemap.remove_tile(tile_pos[0] + i, tile_pos[1] + j):
+                            self.brushed_cells.add((tile_pos[0] + i, tile_pos[1] + j))
+                self.tilemap.remove_offgrid_tiles(
+                    self.tilemap.offgrid_tiles_at((mouse_pos[0] + self.scroll[0], mouse_pos[1] + self.scroll[1])))
             if self.left_clicking and self.shift_clicking:
                 self.scroll = [self.start_scroll[0]+self.start_mouse_pos[0]-mouse_pos[0], self.start_scroll[1]+self.start_mouse_pos[1]-mouse_pos[1]]
 
@@ -112,7 +108,7 @@ class Editor:
                     if event.button == 1:
                         self.left_clicking = True
                         if not self.shift_clicking and not self.on_grid:
-                            self.tilemap.offgrid_tiles.append({'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': (mouse_pos[0]+self.scroll[0], mouse_pos[1]+self.scroll[1])})
+                            self.tilemap.add_offgrid_tile({'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': (mouse_pos[0]+self.scroll[0], mouse_pos[1]+self.scroll[1])})
                         if self.shift_clicking:
                             self.start_mouse_pos = mouse_pos
                             self.start_scroll = list(self.scroll)
@@ -158,8 +154,13 @@ class Editor:
                         print(f"{'grid' if self.on_grid else 'not grid'}")
                     # Auto tile
                     if event.key == pygame.K_t:
-                        self.tilemap.autotile()
-                        print('autotile')
+                        if self.ctrl_clicking:
+                            self.tilemap.autotile()
+                            print('autotile')
+                        else:
+                            self.tilemap.autotile(self.brushed_cells)
+                            print(f'autotile {len(self.brushed_cells)} brushed tiles')
+                        self.brushed_cells = set()
                     # Saving
                     if event.key == pygame.K_s:
                         if self.ctrl_clicking:
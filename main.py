@@ -1,5 +1,16 @@
+import argparse
+
+from scripts.core.constants import TEAMS
 from scripts.game import Game
 
-game = Game()
 
-game.run()
\ No newline at end of file
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play Worms')
+    parser.add_argument('--bot', type=int, action='append', choices=range(TEAMS), metavar='TEAM',
+                        help=f'team played by the computer (0 to {TEAMS - 1}), repeat it for a bot against bot match')
+    args = parser.parse_args()
+
+    game = Game()
+    if args.bot is not None:
+        game.bot_teams = args.bot
+    game.run()
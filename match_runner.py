@@ -0,0 +1,127 @@
+import argparse
+import csv
+import json
+import os
+from multiprocessing import Pool
+from time import perf_counter
+
+from scripts.core.constants import FPS, MAX_WIND, TEAMS, TEAM_WORMS
+from scripts.core.utils import get_map_names
+from scripts.entities.bot import Bot
+from scripts.features.grenade import Grenade
+from scripts.features.rocket import Rocket
+from scripts.simulation import Simulation
+
+WEAPONS = {'Rocket': Rocket, 'Grenade': Grenade}
+
+
+def apply_overrides(overrides):
+    """ Set weapon class attributes from 'Class.attribute=value' strings, in each worker process """
+    for override in overrides:
+        name, value = override.split('=')
+        class_name, attribute = name.split('.')
+        setattr(WEAPONS[class_name], attribute, type(getattr(WEAPONS[class_name], attribute))(float(value)))
+
+def run_match(task):
+    """ Play one bot against bot match, returns its result row """
+    map_name, index, seed, max_wind, max_turns, bot_batches, worms = task
+    match_seed = f'{seed}/{map_name}/{index}'
+    start = perf_counter()
+    sim = Simulation(match_seed, max_wind=max_wind)
+    sim.load_level(map_name, team_worms=worms)
+    bots = [Bot(sim, team, f'{match_seed}/bot{team}', batches=bot_batches) for team in range(TEAMS)]
+    while sim.winner is None and sim.turns < max_turns:
+        for bot in bots:
+            bot.update()
+        sim.step()
+    return {
+        'map': map_name,
+        'match': index,
+        'winner': -1 if sim.winner is None else sim.winner,
+        'turns': sim.turns,
+        'steps': sim.steps,
+        'game_seconds': round(sim.steps / FPS, 2),
+        'health': ' '.join(str(round(max(0, player.health), 1)) for player in sim.players),
+        'ms': round((perf_counter() - start) * 1000, 2),
+    }
+
+def same_result(row, other):
+    """ Matches played alike, their run time aside """
+    return {**row, 'ms': None} == {**other, 'ms': None}
+
+def aggregate(rows):
+    maps = {}
+    for row in rows:
+        maps.setdefault(row['map'], []).append(row)
+    report = []
+    for map_name, matches in sorted(maps.items()):
+        count = len(matches)
+        report.append({
+            'map': map_name,
+            'matches': count,
+            'p1_win_rate': round(sum(row['winner'] == 0 for row in matches) / count, 3),
+            'p2_win_rate': round(sum(row['winner'] == 1 for row in matches) / count, 3),
+            'draw_rate': round(sum(row['winner'] == -1 for row in matches) / count, 3),
+            'mean_turns': round(sum(row['turns'] for row in matches) / count, 2),
+            'mean_game_seconds': round(sum(row['game_seconds'] for row in matches) / count, 2),
+            'mean_ms': round(sum(row['ms'] for row in matches) / count, 2),
+        })
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run headless bot against bot matches on every map')
+    parser.add_argument('maps', nargs='*', help='map names, all maps by default')
+    parser.add_argument('-n', '--matches', type=int, default=10, help='matches per map')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', default='0', help='matches are seeded from it, the map name and their index')
+    parser.add_argument('--max-turns', type=int, default=60, help='matches are a draw past it')
+    parser.add_argument('--max-wind', type=int, default=MAX_WIND)
+    parser.add_argument('--worms', type=int, default=TEAM_WORMS, help='worms per team')
+    parser.add_argument('--bot-batches', type=int, default=4,
+                        help='shot search batches per bot turn, a fixed count keeps matches reproducible')
+    parser.add_argument('--check', action='store_true', help='play every match twice and fail if the results differ')
+    parser.add_argument('--set', action='append', default=[], metavar='CLASS.ATTR=VALUE',
+                        help='weapon balance override, e.g. Rocket.damage=40 or Grenade.max_force=200')
+    parser.add_argument('--csv', help='write one row per match')
+    parser.add_argument('--json', help='write the per map report and every match')
+    args = parser.parse_args()
+
+    tasks = [(map_name, index, args.seed, args.max_wind, args.max_turns, args.bot_batches, args.worms)
+             for map_name in args.maps or get_map_names() for index in range(args.matches)]
+    start = perf_counter()
+    with Pool(args.workers, initializer=apply_overrides, initargs=(args.set,)) as pool:
+        rows = list(pool.imap_unordered(run_match, tasks))
+        if args.check:
+            # Replayed in another order and worker, the results must not depend on either
+            replays = pool.map(run_match, tasks[::-1])[::-1]
+    elapsed = perf_counter() - start
+    rows.sort(key=lambda row: (row['map'], row['match']))
+    report = aggregate(rows)
+
+    print(f'{"map":<16}{"matches":>8}{"p1 win":>8}{"p2 win":>8}{"draw":>7}{"turns":>7}{"game s":>8}{"ms":>9}')
+    for line in report:
+        print(f'{line["map"]:<16}{line["matches"]:>8}{line["p1_win_rate"]:>8.2f}{line["p2_win_rate"]:>8.2f}'
+              f'{line["draw_rate"]:>7.2f}{line["mean_turns"]:>7.1f}{line["mean_game_seconds"]:>8.1f}{line["mean_ms"]:>9.1f}')
+    print(f'{len(rows)} matches in {elapsed:.2f}s on {args.workers} workers')
+
+    if args.check:
+        replayed = {(row['map'], row['match']): row for row in replays}
+        different = [row for row in rows if not same_result(row, replayed[(row['map'], row['match'])])]
+        for row in different:
+            print(f'not reproducible: {row["map"]} {row["match"]}: {row} then {replayed[(row["map"], row["match"])]}')
+        if different:
+            raise SystemExit(1)
+        print('every match played alike twice')
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump({'seed': args.seed, 'max_turns': args.max_turns, 'max_wind': args.max_wind,
+                       'bot_batches': args.bot_batches, 'worms': args.worms,
+                       'overrides': args.set, 'seconds': round(elapsed, 2), 'maps': report, 'matches': rows},
+                      json_file, indent=2)
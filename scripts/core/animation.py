@@ -1,6 +1,14 @@
+from pygame import transform, mask, Surface, SRCALPHA
+
+OUTLINE_OFFSETS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
 class Animation:
-    def __init__(self, images, img_duration=5, loop=True):
+    def __init__(self, images, img_duration=5, loop=True, flipped=None, outlines=None):
         self.images = images
+        # Shared by every copy: horizontally flipped images, and outline surfaces per (color, flip)
+        self.flipped = flipped if flipped is not None else [transform.flip(img, True, False) for img in images]
+        self.outlines = outlines if outlines is not None else {}
         self.img_duration = img_duration
         self.loop = loop
         self.done = False
@@ -8,10 +16,23 @@ class Animation:
         self.frame_progress = 0
 
     def copy(self):
-        return Animation(self.images, self.img_duration, self.loop)
+        return Animation(self.images, self.img_duration, self.loop, self.flipped, self.outlines)
     
-    def img(self):
-        return self.images[int(self.frame / self.img_duration)]
+    def img(self, flip=False):
+        return (self.flipped if flip else self.images)[int(self.frame / self.img_duration)]
+
+    def outline(self, color, flip=False):
+        """ Silhouette of the current image grown by one pixel, to blit at (-1, -1) under the image """
+        if (color, flip) not in self.outlines:
+            surfaces = []
+            for img in (self.flipped if flip else self.images):
+                silhouette = mask.from_surface(img).to_surface(setcolor=color, unsetcolor=(0, 0, 0, 0))
+                outline = Surface((img.get_width() + 2, img.get_height() + 2), SRCALPHA)
+                for offset in OUTLINE_OFFSETS:
+                    outline.blit(silhouette, (1 - offset[0], 1 - offset[1]))
+                surfaces.append(outline)
+            self.outlines[(color, flip)] = surfaces
+        return self.outlines[(color, flip)][int(self.frame / self.img_duration)]
     
     def update(self, delta_time=1):
         self.frame_progress += delta_time
@@ -0,0 +1,99 @@
+import os
+from time import perf_counter
+
+import pygame
+
+from scripts.core.atlas import pack_atlas
+from scripts.core.utils import IMG_PATH, load_image
+
+
+class Assets:
+    # ===== SINGLETON =====
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super(Assets, cls).__new__(cls)
+            cls.__instance.__initialized = False
+        return cls.__instance
+
+    def __init__(self):
+        if (self.__initialized): return
+        self.__initialized = True
+
+        self.cache = {}
+        self.stats = {}  # group -> [loaded count, load seconds, surface bytes]
+
+    def _load(self, key, group, loader):
+        """ Memoize the asset under key, timing the load and counting surface memory in its group """
+        if key in self.cache:
+            return self.cache[key]
+
+        start = perf_counter()
+        asset = loader()
+        stats = self.stats.setdefault(group, [0, 0, 0])
+        stats[0] += 1
+        stats[1] += perf_counter() - start
+        for surf in asset if isinstance(asset, tuple) else [asset]:
+            if isinstance(surf, pygame.Surface):
+                stats[2] += surf.get_pitch() * surf.get_height()
+        self.cache[key] = asset
+        return asset
+
+    def image(self, path, colorkey=(0, 0, 0), alpha=False):
+        folders = [folder for folder in path.split('/')[:-1] if folder != '..']
+        return self._load(('image', path, colorkey, alpha), folders[0] if folders else 'images',
+                          lambda: load_image(path, colorkey, alpha))
+
+    def images(self, path, colorkey=(0, 0, 0)):
+        """ Every image of a folder, sorted by name """
+        key = ('images', path, colorkey)
+        if key not in self.cache:
+            self.cache[key] = [self.image(path + '/' + img_name, colorkey)
+                               for img_name in sorted(os.listdir(IMG_PATH + path))]
+        return self.cache[key]
+
+    def image_folders(self, roots):
+        """ Every folder holding images under the roots, with its sorted file names """
+        folders = []
+        for root in roots:
+            for folder, _, files in sorted(os.walk(IMG_PATH + root)):
+                if files:
+                    folders.append((os.path.relpath(folder, IMG_PATH).replace(os.sep, '/'), sorted(files)))
+        return folders
+
+    def atlas(self, roots, colorkey=(0, 0, 0), packed=True):
+        """ Images of every folder under the roots keyed by folder, as subsurfaces of one atlas if packed """
+        if not packed:
+            return {folder: self.images(folder, colorkey) for folder, _ in self.image_folders(roots)}
+
+        def loader():
+            folders = self.image_folders(roots)
+            images = [load_image(folder + '/' + img_name, colorkey) for folder, files in folders for img_name in files]
+            atlas, subsurfaces = pack_atlas(images, colorkey)
+            frames = {}
+            for folder, files in folders:
+                frames[folder] = subsurfaces[:len(files)]
+                subsurfaces = subsurfaces[len(files):]
+            return atlas, frames
+        atlas, frames = self._load(('atlas', tuple(roots), colorkey), 'atlas', loader)
+        return frames
+
+    def sound(self, path, volume=1.0):
+        """ Sounds are keyed with their volume, as the volume is a property of the Sound object """
+        def loader():
+            sound = pygame.mixer.Sound(path)
+            sound.set_volume(volume)
+            return sound
+        return self._load(('sound', path, volume), os.path.basename(os.path.dirname(path)), loader)
+
+    def group_stats(self):
+        """ Loaded assets, load time and resident surface memory per group, as sent in the telemetry 'level' record """
+        return {group: {'assets': count, 'load_ms': round(seconds * 1000, 1), 'memory_kb': size // 1024}
+                for group, (count, seconds, size) in sorted(self.stats.items())}
+
+    def report(self):
+        lines = [f'{"group":<12}{"assets":>8}{"load ms":>10}{"memory KB":>11}']
+        for group, stats in self.group_stats().items():
+            lines.append(f'{group:<12}{stats["assets"]:>8}{stats["load_ms"]:>10.1f}{stats["memory_kb"]:>11}')
+        return '\n'.join(lines)
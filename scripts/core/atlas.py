@@ -0,0 +1,29 @@
+from pygame import Surface
+
+ATLAS_WIDTH = 256
+ATLAS_PADDING = 1
+
+
+def pack_atlas(images, colorkey=(0, 0, 0), width=ATLAS_WIDTH, padding=ATLAS_PADDING):
+    """ Pack the images in one surface, tallest first on shelves, returns the atlas and a subsurface per image """
+    width = max([width] + [img.get_width() for img in images])
+    positions = [None] * len(images)
+    x = y = shelf_height = 0
+    for i in sorted(range(len(images)), key=lambda i: -images[i].get_height()):
+        img_width, img_height = images[i].get_size()
+        if x + img_width > width:
+            x = 0
+            y += shelf_height + padding
+            shelf_height = 0
+        positions[i] = (x, y)
+        x += img_width + padding
+        shelf_height = max(shelf_height, img_height)
+
+    atlas = Surface((width, max(1, y + shelf_height)))
+    atlas.fill(colorkey)
+    atlas.set_colorkey(colorkey)
+    subsurfaces = []
+    for img, pos in zip(images, positions):
+        atlas.blit(img, pos)
+        subsurfaces.append(atlas.subsurface((pos, img.get_size())))
+    return atlas, subsurfaces
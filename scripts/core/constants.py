@@ -1,4 +1,12 @@
 # SCREEN_SIZE = (640, 480)
 SCREEN_SIZE = (960, 720)
 FPS = 60
-TARGET_FPS = 60
\ No newline at end of file
+TURN_SECONDS = 30
+MAX_WIND = 50
+MAX_FRAME_STEPS = 5  # simulation steps run per rendered frame at most, the game slows down below FPS / 5
+PIXEL_TERRAIN = False  # Per-pixel destructible terrain instead of whole tiles
+TEXTURE_ATLAS = False  # Tiles, entities and particles as subsurfaces of one atlas, see benchmark_atlas.py
+TEAMS = 2  # one per player skin and spawner variant
+TEAM_WORMS = 1  # worms per team
+BOT_TEAMS = []  # Teams played by the computer by default, see Bot and main.py --bot
+TELEMETRY_PATH = None  # JSONL file streamed with per-frame metrics and frame-spike dumps, see Telemetry
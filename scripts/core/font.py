@@ -1,57 +1,79 @@
+from collections import OrderedDict
+
 import pygame
 
+FONT_CACHE_SIZE = 64  # rendered strings kept per font
 
-def clip(surf,x,y,x_size,y_size):
-    handle_surf = surf.copy()
-    clipR = pygame.Rect(x,y,x_size,y_size)
-    handle_surf.set_clip(clipR)
-    image = surf.subsurface(handle_surf.get_clip())
-    return image.copy()
 
 class Font():
-    def __init__(self, path, colorkey=(0, 0, 0), scale=1):
+    def __init__(self, path, colorkey=(0, 0, 0), scale=1, cache_size=FONT_CACHE_SIZE):
         self.spacing = 1
         self.character_order = ['A','B','C','D','E','F','G','H','I','J','K','L','M','N','O','P','Q','R','S','T','U','V','W','X','Y','Z','a','b','c','d','e','f','g','h','i','j','k','l','m','n','o','p','q','r','s','t','u','v','w','x','y','z','.','-',',',':','+','\'','!','?','0','1','2','3','4','5','6','7','8','9','(',')','/','_','=','\\','[',']','*','"','<','>',';']
         font_img = pygame.image.load(path).convert()
         font_img.set_colorkey(colorkey)
-        current_char_width = 0
+        self.colorkey = colorkey
         self.characters = {}
-        character_count = 0
-        for x in range(font_img.get_width()):
-            c = font_img.get_at((x, 0))
-            if c[0] == 127:
-                char_img = clip(font_img, x - current_char_width, 0, current_char_width, font_img.get_height())
-                self.characters[self.character_order[character_count]] = pygame.transform.scale_by(char_img.copy(), scale)
-                character_count += 1
-                current_char_width = 0
-            else:
-                current_char_width += 1
+
+        # Characters are separated by a pixel of red 127 on the first row
+        reds = pygame.surfarray.array_red(font_img)[:, 0]
+        start = 0
+        for character, x in zip(self.character_order, (reds == 127).nonzero()[0]):
+            x = int(x)
+            char_img = font_img.subsurface((start, 0, x - start, font_img.get_height()))
+            self.characters[character] = pygame.transform.scale_by(char_img, scale)
+            start = x + 1
         self.space_width = self.characters['A'].get_width()
 
-    def render(self, surf, text, loc, center=False, bg=None, padding=8):
-        # Get width and height
-        height = self.characters['A'].get_height()
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    def text_width(self, text):
         width = 0
         for char in text:
             if char != ' ':
                 width += self.characters[char].get_width() + self.spacing
             else:
                 width += self.space_width + self.spacing
+        return width
 
-        # Get offet
-        x_offset = 0
-        if center:
-            x_offset = -(width / 2)
+    def text_surface(self, text, bg=None, padding=8):
+        """ The text drawn once on its background, kept in a LRU cache """
+        key = (text, bg, padding)
+        surface = self.cache.get(key)
+        if surface is not None:
+            self.cache.move_to_end(key)
+            return surface
 
-        # Background
+        width = self.text_width(text)
+        height = self.characters['A'].get_height()
+        margin = padding if bg is not None else 0
+        surface = pygame.Surface((width + margin * 2, height + margin * 2))
         if bg is not None:
-            pygame.draw.rect(surf, bg, (loc[0] + x_offset - padding, loc[1] - padding, width + padding*2, height + padding*2))
+            surface.fill(bg)
+        else:
+            surface.fill(self.colorkey)
+            surface.set_colorkey(self.colorkey)
 
-        # Text
+        glyphs = []
+        x = margin
         for char in text:
-            old_x_offset = x_offset
             if char != ' ':
-                x_offset += self.characters[char].get_width() + self.spacing
-                surf.blit(self.characters[char], (loc[0] + old_x_offset, loc[1]))
+                glyphs.append((self.characters[char], (x, margin)))
+                x += self.characters[char].get_width() + self.spacing
             else:
-                x_offset += self.space_width + self.spacing
+                x += self.space_width + self.spacing
+        surface.blits(glyphs, doreturn=False)
+
+        self.cache[key] = surface
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return surface
+
+    def render(self, surf, text, loc, center=False, bg=None, padding=8):
+        surface = self.text_surface(text, bg, padding)
+        pos = [loc[0], loc[1]]
+        if bg is not None:
+            pos = [loc[0] - padding, loc[1] - padding]
+        if center:
+            pos[0] = loc[0] - surface.get_width() / 2
+        surf.blit(surface, pos)
@@ -1,25 +1,103 @@
+import numpy as np
 
-class Particle:
-    def __init__(self, game, p_type, pos, velocity=[0, 0], frame=0):
-        self.game      = game
-        self.type      = p_type
-        self.pos       = list(pos)
-        self.velocity  = list(velocity)
-        self.animation = self.game.assets['particles/' + p_type].copy()
-        self.animation.frame = frame
+PARTICLE_CAPACITY = 2048
+PARTICLE_WIND = 0.01  # pixels drifted per step and unit of wind
+
+
+class ParticleSystem:
+    def __init__(self, game, capacity=PARTICLE_CAPACITY):
+        self.game = game
+        self.rng = np.random.default_rng()
+
+        # Particle types, with per type and frame image tables filled when a type is first spawned
+        self.types = {}
+        self.frame_images = []
+        self.frame_halves = []
+        self.last_frames = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.frame = np.zeros(capacity, dtype=np.int32)
+        self.type = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = np.arange(capacity - 1, -1, -1, dtype=np.int32)  # stack of free slots, top at free_count - 1
+        self.free_count = capacity
+
+    def _grow(self, capacity):
+        """ Reallocate bigger arrays, live particles keep their slots """
+        old_capacity = self.capacity
+        old_arrays = (self.pos, self.velocity, self.frame, self.type, self.alive)
+        free = self.free[:self.free_count].copy()
+        self._allocate(capacity)
+        for array, old_array in zip((self.pos, self.velocity, self.frame, self.type, self.alive), old_arrays):
+            array[:old_capacity] = old_array
+        new_slots = np.arange(capacity - 1, old_capacity - 1, -1, dtype=np.int32)
+        self.free_count = len(new_slots) + len(free)
+        self.free[:self.free_count] = np.concatenate((new_slots, free))
+
+    def _type_id(self, p_type):
+        if p_type not in self.types:
+            animation = self.game.assets['particles/' + p_type]
+            self.types[p_type] = len(self.types)
+            # Images indexed by animation frame (not image), like Animation.img
+            images = [animation.images[frame // animation.img_duration]
+                      for frame in range(animation.img_duration * len(animation.images))]
+            frame_images = np.empty(len(images), dtype=object)
+            frame_images[:] = images
+            self.frame_images.append(frame_images)
+            self.frame_halves.append(np.array([(img.get_width() // 2, img.get_height() // 2) for img in images],
+                                              dtype=np.float32))
+            self.last_frames.append(len(images) - 1)
+        return self.types[p_type]
+
+    def __len__(self):
+        return self.capacity - self.free_count
+
+    def spawn(self, p_type, pos, velocities, frame=0):
+        """ Spawn one particle per velocity at pos """
+        velocities = np.asarray(velocities, dtype=np.float32).reshape(-1, 2)
+        count = len(velocities)
+        if count > self.free_count:
+            self._grow(max(self.capacity * 2, len(self) + count))
+        slots = self.free[self.free_count - count:self.free_count]
+        self.free_count -= count
+
+        self.pos[slots] = pos
+        self.velocity[slots] = velocities
+        self.frame[slots] = frame
+        self.type[slots] = self._type_id(p_type)
+        self.alive[slots] = True
+
+    def burst(self, p_type, pos, count, speed):
+        """ Spawn count particles at pos with uniform random velocities in [-speed, speed] """
+        self.spawn(p_type, pos, self.rng.uniform(-speed, speed, (count, 2)))
 
     def update(self):
-        kill = False
-        if self.animation.done:
-            kill = True
+        if self.free_count == self.capacity:
+            return
+        last_frames = np.array(self.last_frames, dtype=np.int32)[self.type]
 
-        self.pos[0] += self.velocity[0]
-        self.pos[1] += self.velocity[1]
+        # Animations done on the previous update are killed
+        dead = np.flatnonzero(self.alive & (self.frame >= last_frames))
+        if len(dead):
+            self.alive[dead] = False
+            self.free[self.free_count:self.free_count + len(dead)] = dead
+            self.free_count += len(dead)
 
-        self.animation.update()
+        alive = self.alive
+        self.pos[alive] += self.velocity[alive] + self.game.wind_field.sample(self.pos[alive]) * PARTICLE_WIND
+        self.frame[alive] = np.minimum(self.frame[alive] + 1, last_frames[alive])
 
-        return kill
-    
-    def render(self, surf, offset=[0, 0]):
-        img = self.animation.img()
-        surf.blit(img, (self.pos[0]-offset[0]-img.get_width()//2, self.pos[1]-offset[1]-img.get_height()//2))
\ No newline at end of file
+    def render(self, surf, offset=(0, 0)):
+        for type_id in range(len(self.types)):
+            slots = np.flatnonzero(self.alive & (self.type == type_id))
+            if not len(slots):
+                continue
+            frames = self.frame[slots]
+            # Drawn between the last two updates, see Game.render
+            pos = self.pos[slots] - self.velocity[slots] * (1 - self.game.interpolation)
+            dests = pos - self.frame_halves[type_id][frames] - np.asarray(offset, dtype=np.float32)
+            surf.blits(zip(self.frame_images[type_id][frames], dests.tolist()), doreturn=False)
@@ -0,0 +1,130 @@
+from time import perf_counter_ns
+
+import numpy as np
+import pygame
+
+PROFILER_FRAMES = 300  # frames kept in the ring buffer, 5 seconds at 60 FPS
+PROFILER_REFRESH = 15  # frames between two redraws of the overlay
+PROFILER_KEY = pygame.K_F3  # toggles the profiler and its overlay
+PHASES = ('events', 'bots', 'simulation', 'players', 'projectiles', 'wind', 'particles',
+          'draw tilemap', 'draw entities', 'draw hud', 'draw minimap', 'draw effects', 'scale', 'overlay', 'display', 'tick')
+IDLE_PHASES = ('tick',)  # waiting for the next frame, not part of the frame work
+GRAPH_SIZE = (PROFILER_FRAMES, 60)  # one pixel column per recorded frame, the frame budget at half height
+OVERLAY_BG = (0, 0, 0)
+OVERLAY_FG = (255, 255, 255)
+BUDGET_COLOR = (255, 80, 80)
+
+
+# Frame profiler: the time since the previous lap is added to the named phase, a frame at a time in a ring
+# buffer of the last PROFILER_FRAMES frames. Laps return at once while disabled, so they can stay in the loop
+class Profiler:
+    def __init__(self, phases=PHASES, frames=PROFILER_FRAMES):
+        self.phases = phases
+        self.index = {phase: i for i, phase in enumerate(phases)}
+        self.work = [i for i, phase in enumerate(phases) if phase not in IDLE_PHASES]
+        self.times = np.zeros((frames, len(phases)), dtype=np.int64)  # nanoseconds
+        self.enabled = False  # timing the frames
+        self.visible = False  # showing the overlay
+        self.recording = False  # timing the frames even with the overlay hidden
+        self.reset()
+
+    def reset(self):
+        self.times[:] = 0
+        self.frame = 0  # frames recorded, the next one goes in row frame % frames
+        self.row = [0] * len(self.phases)
+        self.last = perf_counter_ns()
+        self.overlay = None
+
+    def toggle(self):
+        """ Show or hide the overlay """
+        self.visible = not self.visible
+        self.update_enabled()
+
+    def set_recording(self, recording):
+        """ Time the frames while the overlay is hidden too, for the telemetry """
+        self.recording = recording
+        self.update_enabled()
+
+    def update_enabled(self):
+        enabled = self.visible or self.recording
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def start_frame(self):
+        """ Store the frame timed so far and start a new one """
+        if not self.enabled:
+            return
+        if any(self.row):
+            self.times[self.frame % len(self.times)] = self.row
+            self.frame += 1
+            self.row = [0] * len(self.phases)
+        self.last = perf_counter_ns()
+
+    def lap(self, phase):
+        """ Add the time since the previous lap to the phase """
+        if not self.enabled:
+            return
+        now = perf_counter_ns()
+        self.row[self.index[phase]] += now - self.last
+        self.last = now
+
+    def frame_phases(self):
+        """ Milliseconds per phase of the frame timed so far, None while disabled """
+        if not self.enabled:
+            return None
+        return {phase: round(time / 1e6, 3) for phase, time in zip(self.phases, self.row)}
+
+    def recorded(self):
+        """ Timings of the recorded frames (frames, phases) in nanoseconds, oldest first """
+        count = min(self.frame, len(self.times))
+        start = self.frame % len(self.times) if self.frame > len(self.times) else 0
+        return np.roll(self.times, -start, axis=0)[:count]
+
+    def stats(self):
+        """ p50 and p99 in milliseconds per phase, and the frame work times (frames,) in milliseconds """
+        times = self.recorded()
+        if not len(times):
+            return np.zeros((2, len(self.phases))), np.zeros(0)
+        return np.percentile(times, (50, 99), axis=0) / 1e6, times[:, self.work].sum(axis=1) / 1e6
+
+    # ===== OVERLAY =====
+    def render(self, surf, font, fps):
+        """ Phase percentiles and a frame time graph in the top right corner, redrawn every PROFILER_REFRESH frames """
+        if not self.visible:
+            return
+        if self.overlay is None or self.frame % PROFILER_REFRESH == 0:
+            self.overlay = self.render_overlay(font, fps)
+        surf.blit(self.overlay, (surf.get_width() - self.overlay.get_width() - 8, 8))
+
+    def render_overlay(self, font, fps):
+        (p50, p99), frames = self.stats()
+        rows = [('phase', 'p50', 'p99')]
+        rows += [(phase, f'{p50[i]:.2f}', f'{p99[i]:.2f}') for i, phase in enumerate(self.phases)]
+        if len(frames):
+            rows.append(('frame', f'{np.percentile(frames, 50):.2f}', f'{np.percentile(frames, 99):.2f}'))
+
+        # Phase names on the left, milliseconds right aligned in two columns
+        line_height = font.characters['A'].get_height() + 2
+        column = font.text_width('000.00') + 8
+        right = 4 + max(font.text_width(row[0]) for row in rows) + column
+        width = max(right + column, GRAPH_SIZE[0]) + 8
+        overlay = pygame.Surface((width, len(rows) * line_height + GRAPH_SIZE[1] + 12))
+        overlay.fill(OVERLAY_BG)
+        overlay.set_alpha(200)
+        for i, row in enumerate(rows):
+            y = 4 + i * line_height
+            font.render(overlay, row[0], (4, y))
+            font.render(overlay, row[1], (right - font.text_width(row[1]), y))
+            font.render(overlay, row[2], (right + column - font.text_width(row[2]), y))
+        self.render_graph(overlay, frames, (4, len(rows) * line_height + 8), fps)
+        return overlay
+
+    def render_graph(self, surf, frames, pos, fps):
+        """ One bar per frame, the line is the frame budget 1 / fps, at half the graph height """
+        budget = 1000 / fps
+        height = GRAPH_SIZE[1]
+        bars = np.minimum(frames / budget * height / 2, height).astype(int)
+        for x, bar in enumerate(bars):
+            pygame.draw.line(surf, OVERLAY_FG, (pos[0] + x, pos[1] + height), (pos[0] + x, pos[1] + height - bar))
+        pygame.draw.line(surf, BUDGET_COLOR, (pos[0], pos[1] + height // 2), (pos[0] + GRAPH_SIZE[0], pos[1] + height // 2))
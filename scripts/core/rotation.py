@@ -0,0 +1,39 @@
+from collections import OrderedDict
+
+from pygame import transform
+
+ROTATION_STEPS = 64  # quantized angles per full turn
+MAX_ROTATIONS = 512  # rotated surfaces kept, least recently used are dropped first
+
+
+class RotationCache:
+    # ===== SINGLETON =====
+    __instance = None
+
+    def __new__(cls):
+        if cls.__instance is None:
+            cls.__instance = super(RotationCache, cls).__new__(cls)
+            cls.__instance.__initialized = False
+        return cls.__instance
+
+    def __init__(self):
+        if (self.__initialized): return
+        self.__initialized = True
+
+        self.steps = ROTATION_STEPS
+        self.max_size = MAX_ROTATIONS
+        self.cache = OrderedDict()  # (image, step) -> rotated surface
+
+    def rotate(self, image, angle):
+        """ The image rotated by the quantized angle nearest to angle (degrees, counterclockwise) """
+        step = round(angle * self.steps / 360) % self.steps
+        key = (image, step)
+        rotated = self.cache.get(key)
+        if rotated is None:
+            rotated = transform.rotate(image, step * 360 / self.steps)
+            self.cache[key] = rotated
+            if len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(key)
+        return rotated
@@ -0,0 +1,43 @@
+from math import floor
+
+SPATIAL_CELL = 64  # cell side in pixels, about an explosion diameter
+
+
+# Uniform grid broad-phase: items are bucketed by the cells their rect overlaps, so area queries only
+# test the items of the cells they cover instead of every item
+class SpatialGrid:
+    def __init__(self, cell_size=SPATIAL_CELL):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def clear(self):
+        self.cells.clear()
+
+    def cell_range(self, left, top, right, bottom):
+        size = self.cell_size
+        return floor(left / size), floor(top / size), floor(right / size), floor(bottom / size)
+
+    def insert(self, item, rect):
+        """ Add the item in every cell overlapped by rect (x, y, width, height) """
+        x0, y0, x1, y1 = self.cell_range(rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3])
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                self.cells.setdefault((x, y), []).append(item)
+
+    def query(self, left, top, right, bottom):
+        """ Items of the cells overlapping the area, each once, in insertion order per cell """
+        x0, y0, x1, y1 = self.cell_range(left, top, right, bottom)
+        if x0 == x1 and y0 == y1:
+            return list(self.cells.get((x0, y0), ()))
+        items = {}
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                for item in self.cells.get((x, y), ()):
+                    items[id(item)] = item
+        return list(items.values())
+
+    def query_circle(self, center, radius):
+        return self.query(center[0] - radius, center[1] - radius, center[0] + radius, center[1] + radius)
+
+    def query_segment(self, start, end):
+        return self.query(min(start[0], end[0]), min(start[1], end[1]), max(start[0], end[0]), max(start[1], end[1]))
@@ -0,0 +1,79 @@
+import gc
+import json
+import queue
+import threading
+from collections import deque
+
+from scripts.core.constants import FPS
+
+TELEMETRY_QUEUE = 1024  # records waiting for the writer thread, new ones are dropped (and counted) when it is full
+TELEMETRY_SPIKE_MS = 50  # frames longer than this, 3 frames at 60 FPS, dump the flight recorder
+TELEMETRY_HISTORY_SECONDS = 5  # seconds of detailed frames kept by the flight recorder
+
+
+# Telemetry export: per-frame metrics as JSON lines, written by a background thread fed through a bounded queue,
+# so the render thread never waits on the disk. A frame over the spike budget also dumps the detailed frames of
+# the last seconds kept by the flight recorder: a 'spike' line followed by one 'recorded' line per frame
+class Telemetry:
+    def __init__(self, path, spike_ms=TELEMETRY_SPIKE_MS, history_seconds=TELEMETRY_HISTORY_SECONDS, fps=FPS,
+                 queue_size=TELEMETRY_QUEUE):
+        self.file = open(path, 'w')
+        self.spike_ms = spike_ms
+        self.history = deque(maxlen=int(history_seconds * fps))
+        self.queue = queue.Queue(queue_size)
+        self.dropped = 0
+        self.frame = 0
+        self.last_spike = None  # frame of the last dump, the next one waits for a whole new history
+        self.events = []  # simulation events of the current frame
+        self.gc_collections = self.collections()
+        self.thread = threading.Thread(target=self.write_loop, name='telemetry', daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def collections():
+        """ Garbage collections so far, per generation """
+        return [stats['collections'] for stats in gc.get_stats()]
+
+    def on_event(self, event, data):
+        self.events.append(event)
+
+    def send(self, *records):
+        """ Queue records for the writer thread, dropping them rather than waiting when the queue is full """
+        try:
+            self.queue.put_nowait(records)
+        except queue.Full:
+            self.dropped += len(records)
+
+    def record_frame(self, frame_time, metrics, details):
+        """ Stream the frame metrics, keep them with the details in the flight recorder and dump it on a spike """
+        collections = self.collections()
+        record = {'type': 'frame', 'frame': self.frame, 'frame_ms': round(frame_time * 1000, 3), **metrics,
+                  'gc': [new - old for new, old in zip(collections, self.gc_collections)], 'dropped': self.dropped}
+        self.gc_collections = collections
+        self.send(record)
+        self.history.append({**record, 'type': 'recorded', **details, 'events': self.events})
+        self.events = []
+
+        if record['frame_ms'] > self.spike_ms and (self.last_spike is None or
+                                                   self.frame - self.last_spike >= self.history.maxlen):
+            self.last_spike = self.frame
+            self.send({'type': 'spike', 'frame': self.frame, 'frame_ms': record['frame_ms'],
+                       'budget_ms': self.spike_ms, 'frames': len(self.history)}, *self.history)
+        self.frame += 1
+
+    def write_loop(self):
+        """ Writer thread: one json.dumps per line keeps each encoding short, so it never holds the GIL for long """
+        while True:
+            records = self.queue.get()
+            if records is None:
+                break
+            for record in records:
+                self.file.write(json.dumps(record) + '\n')
+            if self.queue.empty():
+                self.file.flush()
+        self.file.close()
+
+    def close(self):
+        """ Write the queued records and close the file """
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,113 @@
+import os
+from math import floor
+
+from pygame import Surface, mask, draw, image, surfarray
+
+TERRAIN_COLORKEY = (0, 0, 0)
+NORMAL_PROBE = 3  # half size in pixels of the window used to estimate a surface normal
+
+
+def tile_shapes(tile_types):
+    """ Variants of the tile types loaded without a display, colorkeyed like load_image, enough for the mask """
+    from scripts.core.utils import IMG_PATH  # utils imports the tilemap, which imports this module
+    shapes = {}
+    for tile_type in tile_types:
+        folder = IMG_PATH + 'tiles/' + tile_type + '/'
+        shapes[tile_type] = []
+        for name in sorted(os.listdir(folder)):
+            # Dropping the alpha channel like Surface.convert does for load_image, which needs a display
+            img = surfarray.make_surface(surfarray.array3d(image.load(folder + name)))
+            img.set_colorkey((0, 0, 0))
+            shapes[tile_type].append(img)
+    return shapes
+
+
+class Terrain:
+    def __init__(self, tilemap, physics_tiles, overflow=0):
+        self.tilemap = tilemap
+        tile_size = tilemap.tile_size
+        tiles = [tile for tile in tilemap.grid_tiles() if tile[0] != ""]  # (type, variant, x, y)
+        if tiles:
+            xs = [tile[2] for tile in tiles]
+            ys = [tile[3] for tile in tiles]
+            self.origin = (min(xs) * tile_size, min(ys) * tile_size)
+            size = ((max(xs) - min(xs) + 1 + overflow) * tile_size, (max(ys) - min(ys) + 1 + overflow) * tile_size)
+        else:
+            self.origin = (0, 0)
+            size = (1, 1)
+
+        assets = getattr(tilemap.game, 'assets', None)
+        if assets is None:
+            # Headless simulation: only the mask matters, from the physics tiles
+            assets = tile_shapes(physics_tiles)
+            tiles = [tile for tile in tiles if tile[0] in physics_tiles]
+
+        self.surface = Surface(size)
+        self.surface.set_colorkey(TERRAIN_COLORKEY)
+        solid = Surface(size)
+        solid.set_colorkey(TERRAIN_COLORKEY)
+        for tile_type, variant, x, y in tiles:
+            img = assets[tile_type][variant]
+            dest = (x * tile_size - self.origin[0], y * tile_size - self.origin[1])
+            self.surface.blit(img, dest)
+            if tile_type in physics_tiles:
+                solid.blit(img, dest)
+        self.mask = mask.from_surface(solid)
+
+        self.circle_masks = {}
+        self.rect_masks = {}
+
+    def is_solid(self, pos):
+        x = floor(pos[0] - self.origin[0])
+        y = floor(pos[1] - self.origin[1])
+        if 0 <= x < self.mask.get_size()[0] and 0 <= y < self.mask.get_size()[1]:
+            return self.mask.get_at((x, y)) == 1
+        return False
+
+    def overlap_rect(self, rect):
+        """ First solid pixel inside the rect, None if the rect is free """
+        if rect.size not in self.rect_masks:
+            self.rect_masks[rect.size] = mask.Mask(rect.size, fill=True)
+        point = self.mask.overlap(self.rect_masks[rect.size], (rect.x - self.origin[0], rect.y - self.origin[1]))
+        if point:
+            return point[0] + self.origin[0], point[1] + self.origin[1]
+
+    def carve(self, pos, radius):
+        """ Erase a circle of radius pixels from the mask and the rendered surface """
+        radius = int(radius)
+        if radius not in self.circle_masks:
+            circle = Surface((radius * 2 + 1, radius * 2 + 1))
+            circle.set_colorkey(TERRAIN_COLORKEY)
+            draw.circle(circle, (255, 255, 255), (radius, radius), radius)
+            self.circle_masks[radius] = mask.from_surface(circle)
+        center = (int(pos[0] - self.origin[0]), int(pos[1] - self.origin[1]))
+        self.mask.erase(self.circle_masks[radius], (center[0] - radius, center[1] - radius))
+        draw.circle(self.surface, TERRAIN_COLORKEY, center, radius)
+
+    def normal_at(self, pos, direction):
+        """ Axis aligned normal of the surface at pos, from the solid pixels around it """
+        nx = ny = 0
+        for i in range(-NORMAL_PROBE, NORMAL_PROBE + 1):
+            for j in range(1, NORMAL_PROBE + 1):
+                nx += self.is_solid((pos[0] - j, pos[1] + i)) - self.is_solid((pos[0] + j, pos[1] + i))
+                ny += self.is_solid((pos[0] + i, pos[1] - j)) - self.is_solid((pos[0] + i, pos[1] + j))
+        if nx == 0 and ny == 0:
+            nx, ny = -direction[0], -direction[1]
+        if abs(nx) > abs(ny):
+            return (1 if nx > 0 else -1), 0
+        return 0, (1 if ny > 0 else -1)
+
+    def raycast(self, start_pos, end_pos):
+        """ Walk the segment pixel by pixel, return (hit point, face normal) or None """
+        if self.is_solid(start_pos):
+            return (start_pos[0], start_pos[1]), (0, 0)
+        dx = end_pos[0] - start_pos[0]
+        dy = end_pos[1] - start_pos[1]
+        steps = int(max(abs(dx), abs(dy))) + 1
+        for k in range(1, steps + 1):
+            point = (start_pos[0] + dx * k / steps, start_pos[1] + dy * k / steps)
+            if self.is_solid(point):
+                return point, self.normal_at(point, (dx, dy))
+
+    def render(self, surf, offset=(0, 0)):
+        surf.blit(self.surface, (self.origin[0] - offset[0], self.origin[1] - offset[1]))
@@ -1,5 +1,12 @@
 import json
-from pygame import Rect
+import mmap
+import struct
+from collections import OrderedDict
+
+import numpy as np
+from pygame import Rect, Surface
+
+from scripts.core.terrain import Terrain
 
 NEIGHBOR_OFFSET = [(-1, -1), (0, -1), (1, -1), (-1, 0), (0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
 PHYSICS_TILES = {'grass', 'stone'}
@@ -15,14 +22,263 @@ AUTOTILE_MAP = {
     tuple(sorted([(1, 0), (0, -1), (0, 1)])): 7,  # left
     tuple(sorted([(-1, 0), (1, 0), (0, -1), (0, 1)])): 8,  # middle
 }
+AUTOTILE_SHIFTS = [(1, 0), (-1, 0), (0, -1), (0, 1)]
+# Variant for each neighbor bitmask (bit i set when AUTOTILE_SHIFTS[i] has the same type), None to keep the variant
+AUTOTILE_VARIANTS = [None] * 16
+for neighbors, variant in AUTOTILE_MAP.items():
+    AUTOTILE_VARIANTS[sum(1 << AUTOTILE_SHIFTS.index(shift) for shift in neighbors)] = variant
+
+# Solidity grid cell flags
+CELL_TILE = 1
+CELL_PHYSICS = 2
+GRID_MARGIN = 8
+MAX_TILE_TYPES = 255  # type ids are grid bytes, 0 being an empty cell
+
+# Pre-rendered terrain chunks
+CHUNK_SIZE = 16  # tiles per chunk side
+CHUNK_OVERFLOW = 3  # tiles a large image placed on the grid may spill over to the right/bottom
+MAX_CHUNKS = 64
 
+# Offgrid tiles spatial hash
+OFFGRID_BUCKET = 64  # bucket side in pixels
+OFFGRID_MARGIN = 48  # largest offgrid image side, tiles are hashed by their top-left position
 
+# Binary map format: header, type names, then the type-id and variant grids as stored in memory, offgrid table
+BIN_MAGIC = b'WMAP'
+BIN_VERSION = 1
+BIN_HEADER = struct.Struct('<4sHHiiIIHI')  # magic, version, tile_size, origin x/y, width, height, type and offgrid counts
+BIN_OFFGRID = struct.Struct('<BBdd')  # type id, variant, x, y
+
+
+# The grid tiles live in dense byte grids, a type id and a variant per cell, with the solidity flags derived
+# from the type ids. Tile dicts are only created on demand, for the editor, the json save and lookups
 class TileMap:
-    def __init__(self, game, tilemap={}, tile_size: int = 16):
+    def __init__(self, game, tilemap={}, tile_size: int = 16, max_chunks=MAX_CHUNKS):
         self.tile_size = tile_size
-        self.tilemap = tilemap
         self.offgrid_tiles = []
         self.game = game
+        self.max_chunks = max_chunks
+        self.terrain = None
+        self.version = 0  # bumped on every solidity change, so derived data like trajectories can be cached
+        self.reset_types()
+        self.build_grid(tilemap.values())
+        self.build_offgrid_index()
+
+    # ===== TILE TYPES =====
+    def reset_types(self, tile_types=()):
+        """ Start a new type table, the tile types getting the ids from 1 in order """
+        self.tile_types = [None]  # type names by type id
+        self.type_ids = {}
+        self.type_flags = bytearray(256)  # solidity flags by type id
+        for tile_type in tile_types:
+            self.type_id(tile_type)
+
+    def type_id(self, tile_type):
+        """ Id of the tile type in the grids, registering new types """
+        if tile_type not in self.type_ids:
+            if len(self.tile_types) > MAX_TILE_TYPES:
+                raise ValueError(f'more than {MAX_TILE_TYPES} tile types')
+            self.type_ids[tile_type] = len(self.tile_types)
+            self.type_flags[len(self.tile_types)] = CELL_TILE | CELL_PHYSICS if tile_type in PHYSICS_TILES else CELL_TILE
+            self.tile_types.append(tile_type)
+        return self.type_ids[tile_type]
+
+    # ===== SOLIDITY GRID =====
+    def build_grid(self, tiles, margin=GRID_MARGIN):
+        """ Rebuild the grids from tile dicts, with a margin around their bounds """
+        tiles = list(tiles)
+        if tiles:
+            xs = [tile['pos'][0] for tile in tiles]
+            ys = [tile['pos'][1] for tile in tiles]
+            self.grid_origin = (min(xs) - margin, min(ys) - margin)
+            self.grid_width = max(xs) - min(xs) + 1 + margin * 2
+            self.grid_height = max(ys) - min(ys) + 1 + margin * 2
+        else:
+            self.grid_origin = (0, 0)
+            self.grid_width = 0
+            self.grid_height = 0
+
+        self.type_grid = bytearray(self.grid_width * self.grid_height)
+        self.variant_grid = bytearray(self.grid_width * self.grid_height)
+        for tile in tiles:
+            i = self.grid_index(tile['pos'][0], tile['pos'][1])
+            self.type_grid[i] = self.type_id(tile['type'])
+            self.variant_grid[i] = tile['variant']
+        self.flag_grid()
+
+    def flag_grid(self):
+        """ One flag byte per cell for the solidity checks, from the type grid """
+        self.solid_grid = self.type_grid.translate(self.type_flags)
+        self.version += 1
+        self.chunk_cache = OrderedDict()
+
+    def grid_index(self, x, y):
+        """ Index of the tile location (x, y) in the grid, -1 if out of bounds """
+        x -= self.grid_origin[0]
+        y -= self.grid_origin[1]
+        if 0 <= x < self.grid_width and 0 <= y < self.grid_height:
+            return y * self.grid_width + x
+        return -1
+
+    def _write_cell(self, i, type_id, variant):
+        self.version += 1
+        self.type_grid[i] = type_id
+        self.variant_grid[i] = variant
+        self.solid_grid[i] = self.type_flags[type_id]
+
+    def tile_at(self, i):
+        """ Tile dict of the grid cell, created on demand, None if the cell is empty """
+        if self.type_grid[i]:
+            return {'type': self.tile_types[self.type_grid[i]], 'variant': self.variant_grid[i],
+                    'pos': [i % self.grid_width + self.grid_origin[0], i // self.grid_width + self.grid_origin[1]]}
+
+    def grid_cells(self):
+        """ Grid indexes of the tiles, row by row """
+        return np.flatnonzero(np.frombuffer(self.type_grid, dtype=np.uint8)).tolist()
+
+    def grid_tiles(self):
+        """ (type, variant, x, y) of every grid tile, without tile dicts """
+        for i in self.grid_cells():
+            yield (self.tile_types[self.type_grid[i]], self.variant_grid[i],
+                   i % self.grid_width + self.grid_origin[0], i // self.grid_width + self.grid_origin[1])
+
+    @property
+    def tilemap(self):
+        """ Tile dicts keyed 'x;y', created from the grids on every access: edits go through set_tile """
+        tiles = {}
+        for i in self.grid_cells():
+            tile = self.tile_at(i)
+            tiles[str(tile['pos'][0]) + ';' + str(tile['pos'][1])] = tile
+        return tiles
+
+    def tile_count_in_area(self, left, top, right, bottom):
+        """ Grid tiles inside the pixel area """
+        x0 = max(int(left // self.tile_size) - self.grid_origin[0], 0)
+        x1 = min(int(right // self.tile_size) - self.grid_origin[0] + 1, self.grid_width)
+        y0 = max(int(top // self.tile_size) - self.grid_origin[1], 0)
+        y1 = min(int(bottom // self.tile_size) - self.grid_origin[1] + 1, self.grid_height)
+        count = 0
+        for y in range(y0, y1):
+            row = self.solid_grid[y * self.grid_width + x0:y * self.grid_width + x1]
+            count += len(row) - row.count(0)
+        return count
+
+    def set_tile(self, x, y, tile_type, variant):
+        if self.grid_index(x, y) < 0:
+            # Outside the grid, grown around the new tile
+            tiles = self.tilemap
+            tiles[str(x) + ';' + str(y)] = {'type': tile_type, 'variant': variant, 'pos': [x, y]}
+            self.build_grid(tiles.values())
+        else:
+            self._write_cell(self.grid_index(x, y), self.type_id(tile_type), variant)
+            self.invalidate_chunks(x, y)
+        return self.tile_at(self.grid_index(x, y))
+
+    def remove_tile(self, x, y):
+        i = self.grid_index(x, y)
+        if i >= 0 and self.type_grid[i]:
+            self._write_cell(i, 0, 0)
+            self.invalidate_chunks(x, y)
+            return True
+        return False
+
+    # ===== PIXEL TERRAIN =====
+    def bake_terrain(self):
+        """ Switch to pixel terrain: collisions use a per-pixel mask and explosions carve circles """
+        self.terrain = Terrain(self, PHYSICS_TILES, overflow=CHUNK_OVERFLOW)
+        self.version += 1
+
+    # ===== CHUNK CACHE =====
+    def invalidate_chunks(self, x, y):
+        """ Drop the cached chunks showing the tile location (x, y) """
+        for chunk_x in range(x // CHUNK_SIZE, (x + CHUNK_OVERFLOW) // CHUNK_SIZE + 1):
+            for chunk_y in range(y // CHUNK_SIZE, (y + CHUNK_OVERFLOW) // CHUNK_SIZE + 1):
+                self.chunk_cache.pop((chunk_x, chunk_y), None)
+
+    def get_chunk(self, chunk_x, chunk_y):
+        """ Pre-rendered surface of a chunk (None if empty), least recently used chunks are evicted """
+        key = (chunk_x, chunk_y)
+        if key in self.chunk_cache:
+            self.chunk_cache.move_to_end(key)
+            return self.chunk_cache[key]
+
+        chunk = self.render_chunk(chunk_x, chunk_y)
+        self.chunk_cache[key] = chunk
+        if len(self.chunk_cache) > self.max_chunks:
+            self.chunk_cache.popitem(last=False)
+        return chunk
+
+    def render_chunk(self, chunk_x, chunk_y):
+        origin = (chunk_x * CHUNK_SIZE, chunk_y * CHUNK_SIZE)
+        chunk = None
+        for x in range(origin[0] - CHUNK_OVERFLOW, origin[0] + CHUNK_SIZE):
+            for y in range(origin[1] - CHUNK_OVERFLOW, origin[1] + CHUNK_SIZE):
+                i = self.grid_index(x, y)
+                if i < 0 or not self.type_grid[i] or self.tile_types[self.type_grid[i]] == "":
+                    continue
+                if chunk is None:
+                    chunk = Surface((CHUNK_SIZE * self.tile_size, CHUNK_SIZE * self.tile_size))
+                    chunk.set_colorkey((0, 0, 0))
+                chunk.blit(self.game.assets[self.tile_types[self.type_grid[i]]][self.variant_grid[i]],
+                           ((x - origin[0]) * self.tile_size, (y - origin[1]) * self.tile_size))
+        return chunk
+
+    # ===== OFFGRID SPATIAL HASH =====
+    def build_offgrid_index(self):
+        """ Rebuild the buckets of offgrid tiles, each entry keeps its list order to render in the same order """
+        self.offgrid_buckets = {}
+        self.offgrid_count = 0
+        for tile in self.offgrid_tiles:
+            self._hash_offgrid_tile(tile)
+
+    def _hash_offgrid_tile(self, tile):
+        key = (int(tile['pos'][0] // OFFGRID_BUCKET), int(tile['pos'][1] // OFFGRID_BUCKET))
+        self.offgrid_buckets.setdefault(key, []).append((self.offgrid_count, tile))
+        self.offgrid_count += 1
+
+    def add_offgrid_tile(self, tile):
+        self.offgrid_tiles.append(tile)
+        self._hash_offgrid_tile(tile)
+
+    def remove_offgrid_tiles(self, tiles):
+        if not tiles:
+            return
+        removed = {id(tile) for tile in tiles}
+        self.offgrid_tiles = [tile for tile in self.offgrid_tiles if id(tile) not in removed]
+        for tile in tiles:
+            key = (int(tile['pos'][0] // OFFGRID_BUCKET), int(tile['pos'][1] // OFFGRID_BUCKET))
+            bucket = [entry for entry in self.offgrid_buckets.get(key, []) if id(entry[1]) not in removed]
+            if bucket:
+                self.offgrid_buckets[key] = bucket
+            else:
+                self.offgrid_buckets.pop(key, None)
+
+    def offgrid_tiles_in_area(self, left, top, right, bottom):
+        """ Offgrid tiles whose position is inside the area, in list order """
+        entries = []
+        for bucket_x in range(int(left // OFFGRID_BUCKET), int(right // OFFGRID_BUCKET) + 1):
+            for bucket_y in range(int(top // OFFGRID_BUCKET), int(bottom // OFFGRID_BUCKET) + 1):
+                for entry in self.offgrid_buckets.get((bucket_x, bucket_y), ()):
+                    pos = entry[1]['pos']
+                    if left <= pos[0] <= right and top <= pos[1] <= bottom:
+                        entries.append(entry)
+        entries.sort(key=lambda entry: entry[0])
+        return [entry[1] for entry in entries]
+
+    def offgrid_tiles_around(self, pos, radius):
+        """ Offgrid tiles whose position is within radius pixels of pos """
+        return [tile for tile in self.offgrid_tiles_in_area(pos[0] - radius, pos[1] - radius, pos[0] + radius, pos[1] + radius)
+                if (tile['pos'][0] - pos[0]) ** 2 + (tile['pos'][1] - pos[1]) ** 2 <= radius ** 2]
+
+    def offgrid_tiles_at(self, point):
+        """ Offgrid tiles whose image contains the point """
+        tiles = []
+        for tile in self.offgrid_tiles_in_area(point[0] - OFFGRID_MARGIN, point[1] - OFFGRID_MARGIN,
+                                                point[0] + 1, point[1] + 1):
+            tile_img = self.game.assets[tile['type']][tile['variant']]
+            if Rect(tile['pos'][0], tile['pos'][1], tile_img.get_width(), tile_img.get_height()).collidepoint(point):
+                tiles.append(tile)
+        return tiles
 
     def extract(self, id_pairs, keep=False):
         matches = []
@@ -33,44 +289,97 @@ class TileMap:
                 matches.append(tile.copy())
                 if not keep:
                     deleted_offgrid_tiles.append(tile)
-        for tile in deleted_offgrid_tiles:
-            self.offgrid_tiles.remove(tile)
+        self.remove_offgrid_tiles(deleted_offgrid_tiles)
 
-        deleted_tiles = []
-        for loc, tile in self.tilemap.items():
-            if (tile['type'], tile['variant']) in id_pairs:
-                matches.append(tile.copy())
-                matches[-1]['pos'] = matches[-1]['pos'].copy()
-                matches[-1]['pos'][0] *= self.tile_size
-                matches[-1]['pos'][1] *= self.tile_size
-                if not keep:
-                    deleted_tiles.append(loc)
-        for loc in deleted_tiles:
-            del self.tilemap[loc]
+        # Grid tiles in row order, found by scanning the type grid for their type ids
+        cells = set()
+        for tile_type, variant in id_pairs:
+            type_id = self.type_ids.get(tile_type)
+            i = self.type_grid.find(type_id) if type_id else -1
+            while i >= 0:
+                if self.variant_grid[i] == variant:
+                    cells.add(i)
+                i = self.type_grid.find(type_id, i + 1)
+        for i in sorted(cells):
+            tile = self.tile_at(i)
+            if not keep:
+                self.remove_tile(tile['pos'][0], tile['pos'][1])
+            tile['pos'][0] *= self.tile_size
+            tile['pos'][1] *= self.tile_size
+            matches.append(tile)
 
         return matches
 
     def is_pos_in_tile(self, pos, physics=True):
-        tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
-        loc = str(tile_loc[0]) + ';' + str(tile_loc[1])
+        if self.terrain and physics:
+            return self.terrain.is_solid(pos)
+        i = self.grid_index(int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        if i < 0:
+            return False
         if physics:
-            return loc in self.tilemap and self.tilemap[loc]['type'] in PHYSICS_TILES
-        return loc in self.tilemap
+            return (self.solid_grid[i] & CELL_PHYSICS) != 0
+        return self.solid_grid[i] != 0
+
+    def raycast(self, start_pos, end_pos, physics=True):
+        """ Walk the cells crossed by the segment (Amanatides-Woo), return (hit point, face normal) or None """
+        if self.terrain and physics:
+            return self.terrain.raycast(start_pos, end_pos)
+        flag = CELL_PHYSICS if physics else CELL_TILE
+        x = int(start_pos[0] // self.tile_size)
+        y = int(start_pos[1] // self.tile_size)
+        i = self.grid_index(x, y)
+        if i >= 0 and self.solid_grid[i] & flag:
+            return (start_pos[0], start_pos[1]), (0, 0)
+
+        dx = end_pos[0] - start_pos[0]
+        dy = end_pos[1] - start_pos[1]
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        # Segment fraction at the next vertical / horizontal cell border, and between two borders
+        if dx != 0:
+            t_max_x = ((x + (step_x > 0)) * self.tile_size - start_pos[0]) / dx
+            t_delta_x = self.tile_size / abs(dx)
+        else:
+            t_max_x = t_delta_x = float('inf')
+        if dy != 0:
+            t_max_y = ((y + (step_y > 0)) * self.tile_size - start_pos[1]) / dy
+            t_delta_y = self.tile_size / abs(dy)
+        else:
+            t_max_y = t_delta_y = float('inf')
+
+        while True:
+            if t_max_x < t_max_y:
+                t = t_max_x
+                t_max_x += t_delta_x
+                x += step_x
+                normal = (-step_x, 0)
+            else:
+                t = t_max_y
+                t_max_y += t_delta_y
+                y += step_y
+                normal = (0, -step_y)
+            if t > 1:
+                return None
+            i = self.grid_index(x, y)
+            if i >= 0 and self.solid_grid[i] & flag:
+                return (start_pos[0] + dx * t, start_pos[1] + dy * t), normal
+
+    @staticmethod
+    def hit_point_inside(hit):
+        """ The raycast hit point, on the face of the hit cell, moved half a pixel into that cell """
+        (x, y), normal = hit
+        return x - normal[0] / 2, y - normal[1] / 2
 
     def line_touch_tile(self, start_pos, end_pos, physics=True):
-        steps = 100
-        for t in range(steps + 1):
-            x = int(start_pos[0] + t * (end_pos[0] - start_pos[0]) / steps)
-            y = int(start_pos[1] + t * (end_pos[1] - start_pos[1]) / steps)
-            touched = self.is_pos_in_tile((x, y), physics=physics)
-            if touched:
-                return x, y
+        hit = self.raycast(start_pos, end_pos, physics=physics)
+        if hit:
+            point = self.hit_point_inside(hit)
+            return int(point[0]), int(point[1])
 
     def get_tile(self, pos):
-        tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
-        loc = str(tile_loc[0]) + ';' + str(tile_loc[1])
-        if loc in self.tilemap:
-            return self.tilemap[loc]
+        i = self.grid_index(int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        if i >= 0:
+            return self.tile_at(i)
 
     def get_tile_rect(self, pos):
         tile = self.get_tile(pos)
@@ -81,58 +390,85 @@ class TileMap:
         tiles = []
         tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
         for offset in NEIGHBOR_OFFSET:
-            loc = str(tile_loc[0] + offset[0]) + ';' + str(tile_loc[1] + offset[1])
-            if loc in self.tilemap:
-                tiles.append(self.tilemap[loc])
+            i = self.grid_index(tile_loc[0] + offset[0], tile_loc[1] + offset[1])
+            if i >= 0 and self.type_grid[i]:
+                tiles.append(self.tile_at(i))
         return tiles
 
     def physics_rects_around(self, pos):
+        # Hot path of every worm update, the grid indexes are computed inline
         rects = []
-        for tile in self.tiles_around(pos):
-            if tile['type'] in PHYSICS_TILES:
-                rects.append(Rect(tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size, self.tile_size,
-                                  self.tile_size))
+        tile_size = self.tile_size
+        tile_x = int(pos[0] // tile_size)
+        tile_y = int(pos[1] // tile_size)
+        grid_x = tile_x - self.grid_origin[0]
+        grid_y = tile_y - self.grid_origin[1]
+        for dx, dy in NEIGHBOR_OFFSET:
+            x = grid_x + dx
+            y = grid_y + dy
+            if 0 <= x < self.grid_width and 0 <= y < self.grid_height and self.solid_grid[y * self.grid_width + x] & CELL_PHYSICS:
+                rects.append(Rect((tile_x + dx) * tile_size, (tile_y + dy) * tile_size, tile_size, tile_size))
         return rects
 
     def solid_check(self, pos):
-        tile_loc = str(int(pos[0] // self.tile_size)) + ';' + str(int(pos[1] // self.tile_size))
-        if tile_loc in self.tilemap:
-            if self.tilemap[tile_loc]['type'] in PHYSICS_TILES:
-                return self.tilemap[tile_loc]
+        i = self.grid_index(int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        if i >= 0 and self.solid_grid[i] & CELL_PHYSICS:
+            return self.tile_at(i)
 
-    def remove_tiles_around(self, pos, radius=1):
-        start_loc = str(int(pos[0] // self.tile_size)) + ';' + str(int(pos[1] // self.tile_size))
+    def remove_tiles_around(self, pos, radius=1, autotile=False):
+        """ Remove the tiles in a circle around pos, returns the removed tile locations """
+        start_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        removed = set()
         for y in range(-radius, radius+1, 1):
             for x in range(-radius, radius + 1, 1):
                 if y**2 + x**2 <= radius**2:
-                    t = start_loc.split(';')
-                    tile_loc = str(int(t[0]) + x) + ';' + str(int(t[1]) + y)
-                    if tile_loc in self.tilemap:
-                        del self.tilemap[tile_loc]
-
-        offgrid_tile_to_del = []
-        for i in range(len(self.offgrid_tiles)):
-            tpos = self.offgrid_tiles[i]["pos"]
-            if (tpos[0] - pos[0])**2 + (tpos[1] - pos[1])**2 <= (radius * self.tile_size)**2:
-                offgrid_tile_to_del.append(i)
-
-        offgrid_tiles = []
-        for i in range(len(self.offgrid_tiles)):
-            if i not in offgrid_tile_to_del:
-                offgrid_tiles.append(self.offgrid_tiles[i])
-        self.offgrid_tiles = offgrid_tiles
-
-
-    def autotile(self):
-        for tile in self.tilemap.values():
-            neighbors = set()
-            for shift in [(1, 0), (-1, 0), (0, -1), (0, 1)]:
-                check_loc = str(tile['pos'][0] + shift[0]) + ';' + str(tile['pos'][1] + shift[1])
-                if check_loc in self.tilemap and self.tilemap[check_loc]['type'] == tile['type']:
-                    neighbors.add(shift)
-            neighbors = tuple(sorted(neighbors))
-            if (tile['type'] in AUTOTILE_TYPES) and (neighbors in AUTOTILE_MAP):
-                tile['variant'] = AUTOTILE_MAP[neighbors]
+                    if self.remove_tile(start_loc[0] + x, start_loc[1] + y):
+                        removed.add((start_loc[0] + x, start_loc[1] + y))
+
+        self.remove_offgrid_tiles(self.offgrid_tiles_around(pos, radius * self.tile_size))
+
+        if self.terrain:
+            self.terrain.carve(pos, radius * self.tile_size)
+            self.version += 1
+        elif autotile and removed:
+            self.autotile(removed)
+        return removed
+
+    def autotile(self, cells=None):
+        """ Autotile the whole map, or only the given tile locations and their neighbors """
+        if cells is None:
+            for i in self.grid_cells():
+                self.autotile_cell(i)
+            self.chunk_cache.clear()
+            return
+
+        to_check = set()
+        for x, y in cells:
+            to_check.add((x, y))
+            for shift in AUTOTILE_SHIFTS:
+                to_check.add((x + shift[0], y + shift[1]))
+        for x, y in to_check:
+            i = self.grid_index(x, y)
+            if i >= 0 and self.autotile_cell(i):
+                self.invalidate_chunks(x, y)
+
+    def autotile_cell(self, i):
+        """ Pick the variant of the tile in the grid cell from its neighbors, returns True if it changed """
+        type_id = self.type_grid[i]
+        if self.tile_types[type_id] not in AUTOTILE_TYPES:
+            return False
+        x = i % self.grid_width + self.grid_origin[0]
+        y = i // self.grid_width + self.grid_origin[1]
+        neighbors = 0
+        for bit, shift in enumerate(AUTOTILE_SHIFTS):
+            j = self.grid_index(x + shift[0], y + shift[1])
+            if j >= 0 and self.type_grid[j] == type_id:
+                neighbors |= 1 << bit
+        variant = AUTOTILE_VARIANTS[neighbors]
+        if variant is None or variant == self.variant_grid[i]:
+            return False
+        self.variant_grid[i] = variant
+        return True
 
     def save(self, path):
         with open(path, 'w') as json_file:
@@ -141,29 +477,74 @@ class TileMap:
     def load(self, path):
         with open(path, 'r') as json_file:
             map_data = json.load(json_file)
-            self.tilemap = map_data['tilemap']
             self.tile_size = map_data['tile_size']
             self.offgrid_tiles = map_data['offgrid']
+        self.reset_types()
+        self.build_grid(map_data['tilemap'].values())
+        self.build_offgrid_index()
+
+    def save_binary(self, path):
+        """ Save the map as typed arrays, the grids as they are in memory, margin included, see load_binary """
+        types = self.tile_types[1:]
+        types += sorted({tile['type'] for tile in self.offgrid_tiles} - set(types))
+        type_ids = {tile_type: i + 1 for i, tile_type in enumerate(types)}  # the grid ids, 0 is an empty cell
+
+        with open(path, 'wb') as bin_file:
+            bin_file.write(BIN_HEADER.pack(BIN_MAGIC, BIN_VERSION, self.tile_size, self.grid_origin[0], self.grid_origin[1],
+                                           self.grid_width, self.grid_height, len(types), len(self.offgrid_tiles)))
+            for tile_type in types:
+                name = tile_type.encode()
+                bin_file.write(bytes([len(name)]) + name)
+            bin_file.write(self.type_grid)
+            bin_file.write(self.variant_grid)
+            for tile in self.offgrid_tiles:
+                bin_file.write(BIN_OFFGRID.pack(type_ids[tile['type']], tile['variant'], tile['pos'][0], tile['pos'][1]))
+
+    def load_binary(self, path):
+        """ Load a map saved by save_binary: the grids are copied from the file and the solidity grid translated
+        from the type ids, without creating a dict per grid tile """
+        with open(path, 'rb') as bin_file, mmap.mmap(bin_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version, tile_size, origin_x, origin_y, width, height, type_count, offgrid_count = \
+                BIN_HEADER.unpack_from(data, 0)
+            if magic != BIN_MAGIC or version != BIN_VERSION:
+                raise ValueError(f'{path} is not a version {BIN_VERSION} binary map')
+
+            offset = BIN_HEADER.size
+            types = []
+            for _ in range(type_count):
+                length = data[offset]
+                types.append(data[offset + 1:offset + 1 + length].decode())
+                offset += 1 + length
+            cells = width * height
+            self.type_grid = bytearray(data[offset:offset + cells])
+            self.variant_grid = bytearray(data[offset + cells:offset + cells * 2])
+            offset += cells * 2
+            offgrid = data[offset:offset + offgrid_count * BIN_OFFGRID.size]
+
+        self.tile_size = tile_size
+        self.grid_origin = (origin_x, origin_y)
+        self.grid_width = width
+        self.grid_height = height
+        self.reset_types(types)
+        self.flag_grid()
+        self.offgrid_tiles = [{'type': types[type_id - 1], 'variant': variant, 'pos': [x, y]}
+                              for type_id, variant, x, y in BIN_OFFGRID.iter_unpack(offgrid)]
+        self.build_offgrid_index()
 
     def render(self, surf, offset=[0, 0]):
-        for tile in self.offgrid_tiles:
+        for tile in self.offgrid_tiles_in_area(offset[0] - OFFGRID_MARGIN, offset[1] - OFFGRID_MARGIN,
+                                               offset[0] + surf.get_width(), offset[1] + surf.get_height()):
             surf.blit(
                 self.game.assets[tile['type']][tile['variant']],
                 (tile['pos'][0] - offset[0], tile['pos'][1] - offset[1]))
-            if tile['type'] in PHYSICS_TILES:
-                pass
-
-        for x in range(int(offset[0] // self.tile_size), int((offset[0] + surf.get_width()) // self.tile_size) + 1):
-            for y in range(int(offset[1] // self.tile_size),
-                           int((offset[1] + surf.get_height()) // self.tile_size) + 1):
-                loc = str(x) + ';' + str(y)
-                if loc in self.tilemap:
-                    tile = self.tilemap[loc]
-                    if tile["type"] != "":
-                        surf.blit(
-                            self.game.assets[tile['type']][tile['variant']],
-                            (tile['pos'][0] * self.tile_size - offset[0], tile['pos'][1] * self.tile_size - offset[1]))
-
-        for tile in self.tilemap.values():
-            if tile['type'] in PHYSICS_TILES:
-                pass
+
+        if self.terrain:
+            self.terrain.render(surf, offset)
+            return
+
+        chunk_px = CHUNK_SIZE * self.tile_size
+        for chunk_x in range(int(offset[0] // chunk_px), int((offset[0] + surf.get_width()) // chunk_px) + 1):
+            for chunk_y in range(int(offset[1] // chunk_px), int((offset[1] + surf.get_height()) // chunk_px) + 1):
+                chunk = self.get_chunk(chunk_x, chunk_y)
+                if chunk:
+                    surf.blit(chunk, (chunk_x * chunk_px - offset[0], chunk_y * chunk_px - offset[1]))
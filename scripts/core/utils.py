@@ -41,8 +41,14 @@ def load_images(path, colorkey=(0, 0, 0)):
     return imgs
 
 def load_map(game, name):
+    """ Load a map, from its converted binary file when it is up to date with the json one """
     tilemap = TileMap(game)
-    tilemap.load(MAP_PATH + '/' + name + '/map.json')
+    json_path = MAP_PATH + '/' + name + '/map.json'
+    bin_path = MAP_PATH + '/' + name + '/map.bin'
+    if os.path.exists(bin_path) and os.path.getmtime(bin_path) >= os.path.getmtime(json_path):
+        tilemap.load_binary(bin_path)
+    else:
+        tilemap.load(json_path)
     return tilemap
 
 def load_maps(game):
@@ -63,6 +69,10 @@ def add_points(point1, point2, sub=False):
         return point1[0] + point2[0], point1[1] + point2[1]
     return point1[0] - point2[0], point1[1] - point2[1]
 
+def lerp_points(point1, point2, t):
+    """ Position between point1 (t = 0) and point2 (t = 1) """
+    return point1[0] + (point2[0] - point1[0]) * t, point1[1] + (point2[1] - point1[1]) * t
+
 def point_to_int(point):
     """ Convert position to int position"""
     return [int(point[0]), int(point[1])]
@@ -0,0 +1,152 @@
+from math import cos, sin, pi
+from random import Random
+from time import perf_counter
+
+import numpy as np
+
+from scripts.core.utils import add_points
+from scripts.features.batch_trajectory import rocket_impacts, GrenadeBatch
+from scripts.features.grenade import Grenade
+from scripts.features.rocket import Rocket
+
+BOT_FRAME_BUDGET_MS = 4  # search time per update, so the render loop never stalls
+BOT_TURN_BUDGET_MS = 300  # search time per turn, the best shot found is fired once spent
+BOT_BATCH = 128  # candidate shots per weapon and batch
+BOT_ROCKET_SLICE = 16  # rockets per search slice, a slice is the unit of work fitted in the frame budget
+BOT_GRENADE_STEPS = 2  # grenade batch steps per search slice
+BOT_REFINE = 0.5  # share of each batch sampled around the best shot so far, the rest is uniform
+BOT_SPREAD = (0.05, 0.08)  # angle (radians) and force (fraction of max_force) spread of the refined candidates
+BOT_MISS_PENALTY = 0.01  # score lost per pixel between the explosion and the closest opponent
+WEAPONS = [Rocket, Grenade]  # by Player.weapon
+
+
+class Bot:
+    def __init__(self, game, team, seed=None, frame_budget=BOT_FRAME_BUDGET_MS, turn_budget=BOT_TURN_BUDGET_MS,
+                 batches=None):
+        self.game = game
+        self.team = team
+        self.rng = Random(seed)
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        self.frame_budget = frame_budget / 1000
+        self.turn_budget = turn_budget / 1000
+        self.batches = batches  # if set, the search stops after that many batches of each weapon instead of the turn budget
+        self.search = None
+        self.slice_cost = {}  # seconds taken by the last slice of each kind
+
+    def update(self):
+        """ Search a shot a slice at a time when a worm of the bot team plays, fire once the turn budget is spent """
+        game = self.game
+        player = game.players[game.player_turn]
+        if player.number != self.team or not game.is_playing() or player.health <= 0:
+            self.search = None
+            return
+        # Players can only shoot once landed
+        if player.air_time > 6:
+            return
+
+        if self.search is None:
+            self.best = [None] * len(WEAPONS)  # (score, angle, force) per weapon
+            self.searched = 0
+            self.batches_done = 0
+            self.search = self.search_shots(player)
+            self.next_slice = next(self.search)
+
+        if self.batches is not None:
+            # The whole search at once: a fixed amount of work per update keeps headless matches reproducible
+            while not self.search_done():
+                self.next_slice = next(self.search)
+        else:
+            self.search_slices()
+
+        if self.search_done():
+            self.search = None
+            self.fire(player)
+
+    def search_slices(self):
+        """ Run slices while the next one is expected to fit in the frame budget, at least one per update """
+        start = perf_counter()
+        elapsed = 0
+        while not self.search_done():
+            if elapsed and elapsed + self.slice_cost.get(self.next_slice, 0) > self.frame_budget:
+                break
+            kind = self.next_slice
+            slice_start = perf_counter()
+            self.next_slice = next(self.search)
+            self.slice_cost[kind] = perf_counter() - slice_start
+            elapsed = perf_counter() - start
+        self.searched += elapsed
+
+    def search_done(self):
+        if self.batches is not None:
+            return self.batches_done >= self.batches
+        return self.searched >= self.turn_budget
+
+    def fire(self, player):
+        candidates = [(best[0], weapon) for weapon, best in enumerate(self.best) if best is not None]
+        if not candidates:
+            return
+        _, weapon = max(candidates)
+        _, angle, force = self.best[weapon]
+        start = add_points(player.pos, player.shoot_offset)
+        player.weapon = weapon
+        player.charge_shoot()
+        # Aim point giving back this angle and force, see Rocket.aim
+        player.shoot((start[0] - force * cos(angle), start[1] + force * sin(angle)))
+
+    # ===== SEARCH =====
+    def search_shots(self, player):
+        """ Anytime search with the best shots so far in self.best, yields the kind of the next slice before running it """
+        game = self.game
+        start = add_points(player.pos, player.shoot_offset)
+        while True:
+            angles, forces = self.candidates(0)
+            for first in range(0, BOT_BATCH, BOT_ROCKET_SLICE):
+                yield 'rocket'
+                chunk = slice(first, first + BOT_ROCKET_SLICE)
+                points, _ = rocket_impacts(game.tilemap, start, angles[chunk], forces[chunk], game.wind)
+                self.keep_best(0, angles[chunk], forces[chunk], points, player)
+
+            angles, forces = self.candidates(1)
+            batch = GrenadeBatch(game.tilemap, start, angles, forces, game.wind)
+            while not batch.done():
+                yield 'grenade'
+                batch.advance(BOT_GRENADE_STEPS)
+            self.keep_best(1, angles, forces, batch.pos, player)
+            self.batches_done += 1
+
+    def candidates(self, weapon):
+        """ Uniform shots, and shots around the best one of the weapon so far """
+        max_force = WEAPONS[weapon].max_force
+        angles = self.np_rng.uniform(0, 2 * pi, BOT_BATCH)
+        forces = self.np_rng.uniform(0.1, 1, BOT_BATCH) * max_force
+        if self.best[weapon] is not None:
+            refined = int(BOT_BATCH * BOT_REFINE)
+            _, angle, force = self.best[weapon]
+            angles[:refined] = self.np_rng.normal(angle, BOT_SPREAD[0], refined) % (2 * pi)
+            forces[:refined] = np.clip(self.np_rng.normal(force, BOT_SPREAD[1] * max_force, refined), 1, max_force)
+        return angles, forces
+
+    def keep_best(self, weapon, angles, forces, points, player):
+        scores = self.score(WEAPONS[weapon], points, player)
+        i = int(np.argmax(scores))
+        if self.best[weapon] is None or scores[i] > self.best[weapon][0]:
+            self.best[weapon] = (float(scores[i]), float(angles[i]), float(forces[i]))
+
+    def score(self, weapon, points, player):
+        """ Expected damage of explosions at the points, as in Simulation.damage_player, minus friendly fire """
+        radius = weapon.damage_radius * self.game.tilemap.tile_size
+        scores = np.zeros(len(points))
+        miss = np.full(len(points), np.inf)
+        for other in self.game.players:
+            if other.health <= 0:
+                continue
+            distance = np.hypot(points[:, 0] - other.pos[0], points[:, 1] - other.pos[1])
+            damage = np.where(distance <= radius, weapon.damage * (1 - distance / radius), 0)
+            if other.number == player.number:
+                scores -= damage
+            else:
+                scores += np.minimum(damage, other.health)
+                miss = np.minimum(miss, distance)
+        if np.isfinite(miss).any():
+            scores -= np.where(np.isfinite(miss), miss, 0) * BOT_MISS_PENALTY
+        return scores
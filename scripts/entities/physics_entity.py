@@ -1,6 +1,8 @@
-from pygame import transform, Rect, mask
+from pygame import Rect
 
-from scripts.core.utils import show_text
+from scripts.core.utils import show_text, lerp_points
+
+TERRAIN_STEP_HEIGHT = 3
 
 
 class PhysicsEntity:
@@ -9,12 +11,14 @@ class PhysicsEntity:
         self.game = game
         self.type = e_type
         self.pos = list(pos)
+        self.prev_pos = list(pos)
         self.size = size
         self.velocity = [0, 0]
         self.collisions = {'top': False, 'bottom': False, 'left': False, 'right': False}
         self.action = ''
         self.anim_offset = (-3, -3)
         self.flip = False
+        self.animation = None
         self.set_action('idle')
         self.outline = outline
 
@@ -24,15 +28,37 @@ class PhysicsEntity:
     def set_action(self, action: str):
         if action != self.action:
             self.action = action
+            if self.game.assets is None:
+                return
             if self.number != None:
                 self.animation = self.game.assets[self.type + str(self.number) + '/' + self.action].copy()
             else:
                 self.animation = self.game.assets[self.type + '/' + self.action].copy()
 
     def update(self, tilemap, movement=(0, 0), delta_time=1):
+        self.prev_pos = list(self.pos)
         self.collisions = {'top': False, 'bottom': False, 'left': False, 'right': False}
         frame_movement = ((movement[0]+self.velocity[0]) * 0.6 * delta_time, (movement[1]+self.velocity[1]) * delta_time)
 
+        if tilemap.terrain:
+            self.terrain_move(tilemap.terrain, frame_movement)
+        else:
+            self.tiles_move(tilemap, frame_movement)
+
+        if movement[0] > 0:
+            self.flip = False
+        if movement[0] < 0:
+            self.flip = True
+
+        self.velocity[1] = min(8, self.velocity[1] + 0.1)
+
+        if self.collisions['top'] or self.collisions['bottom']:
+            self.velocity[1] = 0
+
+        if self.animation:
+            self.animation.update(delta_time=delta_time)
+
+    def tiles_move(self, tilemap, frame_movement):
         self.pos[0] += frame_movement[0]
         entity_rect = self.rect()
         for rect in tilemap.physics_rects_around(self.pos):
@@ -57,26 +83,40 @@ class PhysicsEntity:
                     self.collisions['top'] = True
                 self.pos[1] = entity_rect.y
 
-        if movement[0] > 0:
-            self.flip = False
-        if movement[0] < 0:
-            self.flip = True
-
-        self.velocity[1] = min(8, self.velocity[1] + 0.1)
-
-        if self.collisions['top'] or self.collisions['bottom']:
-            self.velocity[1] = 0
+    def terrain_move(self, terrain, frame_movement):
+        """ Per-pixel collisions against the terrain mask, small steps are climbed when moving horizontaly """
+        self.pos[0] += frame_movement[0]
+        if frame_movement[0] != 0 and terrain.overlap_rect(self.rect()):
+            direction = 1 if frame_movement[0] > 0 else -1
+            for step in range(1, TERRAIN_STEP_HEIGHT + 1):
+                if not terrain.overlap_rect(self.rect().move(0, -step)):
+                    self.pos[1] -= step
+                    break
+            else:
+                self.collisions['right' if direction > 0 else 'left'] = True
+                self.pos[0] = self.rect().x
+                for _ in range(int(abs(frame_movement[0])) + 1):
+                    if not terrain.overlap_rect(self.rect()):
+                        break
+                    self.pos[0] -= direction
 
-        self.animation.update(delta_time=delta_time)
+        self.pos[1] += frame_movement[1]
+        if frame_movement[1] != 0 and terrain.overlap_rect(self.rect()):
+            direction = 1 if frame_movement[1] > 0 else -1
+            self.collisions['bottom' if direction > 0 else 'top'] = True
+            self.pos[1] = self.rect().y
+            for _ in range(int(abs(frame_movement[1])) + 1):
+                if not terrain.overlap_rect(self.rect()):
+                    break
+                self.pos[1] -= direction
 
     def get_render_pos(self, offset=(0, 0)):
-        return [self.pos[0] - offset[0] + self.anim_offset[0], self.pos[1] - offset[1] + self.anim_offset[1]]
+        """ Position between the last two simulation steps, see Game.render """
+        pos = lerp_points(self.prev_pos, self.pos, self.game.interpolation)
+        return [pos[0] - offset[0] + self.anim_offset[0], pos[1] - offset[1] + self.anim_offset[1]]
 
     def render(self, surf, offset=(0, 0)):
         pos = self.get_render_pos(offset)
         if self.outline:
-            entity_mask = mask.from_surface(transform.flip(self.animation.img(), self.flip, False))
-            entity_silouhette = entity_mask.to_surface(setcolor=self.outline, unsetcolor=(0, 0, 0, 0))
-            for mask_offset in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                surf.blit(entity_silouhette, (pos[0]-mask_offset[0], pos[1]-mask_offset[1]))
-        surf.blit(transform.flip(self.animation.img(), self.flip, False), pos)
+            surf.blit(self.animation.outline(self.outline, self.flip), (pos[0] - 1, pos[1] - 1))
+        surf.blit(self.animation.img(self.flip), pos)
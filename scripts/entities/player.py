@@ -4,8 +4,12 @@ from scripts.core.constants import FPS
 from scripts.core.utils import add_points, point_to_int, show_text
 from scripts.entities.physics_entity import PhysicsEntity
 
-from scripts.features.grenade import Grenade
+from scripts.features.airstrike import Airstrike
+from scripts.features.grenade import Grenade, ClusterGrenade
 from scripts.features.rocket import Rocket
+from scripts.features.trajectory import TrajectoryCache
+
+WEAPONS = [Rocket, Grenade, ClusterGrenade, Airstrike]  # by Player.weapon
 
 
 class Player(PhysicsEntity):
@@ -20,6 +24,9 @@ class Player(PhysicsEntity):
 
         self.charge_shooting = False
         self.shoot_offset = [10, 10]
+        self.trajectories = [TrajectoryCache(Rocket.trajectory_segment, FPS),
+                             TrajectoryCache(Grenade.trajectory_segment, FPS)]
+        self.airstrike_trajectories = [TrajectoryCache(Rocket.trajectory_segment, FPS) for _ in range(Airstrike.rockets)]
 
         self.weapon = 0
         self.health = 100
@@ -32,7 +39,7 @@ class Player(PhysicsEntity):
 
     def jump(self):
         if self.charge_jumping:
-            self.game.sfx['jump'].play()
+            self.game.emit('jump', player=self)
             self.velocity[1] = -self.jump_force
             self.jumps -= 1
             self.air_time = 8
@@ -49,15 +56,23 @@ class Player(PhysicsEntity):
             self.set_action('idle')
             self.charge_shooting = False
 
-    def shoot(self):
+    def shoot(self, target):
+        """ Fire the current weapon at the target world position """
         if self.charge_shooting:
             self.charge_shooting = False
-            mouse_pos = add_points(self.game.mouse_pos, self.game.scroll)
             pos = add_points(self.pos, self.shoot_offset)
+            projectiles = []
             if self.weapon == 0:
-                self.game.projectile = Rocket.create(pos, mouse_pos, self.game)
+                projectiles = [Rocket.create(pos, target, self.game, owner=self)]
             elif self.weapon == 1:
-                self.game.projectile = Grenade.create(pos, mouse_pos, self.game)
+                projectiles = [Grenade.create(pos, target, self.game)]
+            elif self.weapon == 2:
+                projectiles = [ClusterGrenade.create(pos, target, self.game)]
+            elif self.weapon == 3:
+                projectiles = Airstrike.create(target, self.game)
+            for projectile in projectiles:
+                self.game.add_projectile(projectile)
+            self.game.emit('shoot', player=self, projectiles=projectiles)
 
     def update(self, tilemap, movement=(0, 0), delta_time=1):
         if self.health <= 0:
@@ -65,8 +80,7 @@ class Player(PhysicsEntity):
 
         if self.pos[1] > 1500:
             self.health = 0
-            self.game.sfx['hurt'].play()
-            self.game.shake_screen(60, 0.2)
+            self.game.emit('fall', player=self)
 
         # Charge jump
         if self.charge_jumping:
@@ -83,7 +97,7 @@ class Player(PhysicsEntity):
         if abs(movement[0]) >= 1 and self.air_time <= 8:
             self.footstep_tick -= 1
             if self.footstep_tick == 0:
-                self.game.sfx['footstep'].play()
+                self.game.emit('footstep', player=self)
                 self.footstep_tick = 16
         else:
             self.footstep_tick = 16
@@ -106,7 +120,7 @@ class Player(PhysicsEntity):
 
         # Parachute
         if self.velocity[1] >= 8:
-            self.game.sfx['parachute'].play()
+            self.game.emit('parachute', player=self)
             self.parachute = True
         if self.parachute:
             self.velocity[1] = max(2, self.velocity[1] - 0.3)
@@ -133,20 +147,28 @@ class Player(PhysicsEntity):
             pygame.draw.rect(surf, (255, 0, 0), (healthbar_pos, (healthbar_width, 2)))
             pygame.draw.rect(surf, (0, 255, 0), (healthbar_pos, (self.health / 100 * healthbar_width, 2)))
 
-            # Weapon trajectory
+            # Weapon trajectory, in the interpolated render offset of the world so it stays on the terrain
             if self.charge_shooting:
-                mouse_pos = add_points(self.game.mouse_pos, self.game.scroll)
+                mouse_pos = add_points(self.game.mouse_pos, offset)
                 pos = add_points(self.pos, self.shoot_offset)
 
-                trajectory = []
+                trajectories = []
                 if self.weapon == 0:
-                    trajectory = Rocket.calculate_trajectory(self.game.tilemap, self.game.wind, point_to_int(pos), mouse_pos, FPS)
-                elif self.weapon == 1:
-                    trajectory = Grenade.calculate_trajectory(self.game.tilemap, point_to_int(pos), mouse_pos, FPS)
-
-                radius = 4.5
-                c = 255
-                for i, point in enumerate(trajectory):
-                    pygame.draw.circle(surf, (c, c, c), add_points(point, self.game.scroll, sub=True), radius)
-                    radius = max(2, radius * 0.95)
-                    c = max(100, c * 0.97)
+                    state = Rocket.trajectory_state(point_to_int(pos), mouse_pos, self.game.wind)
+                    trajectories = [self.trajectories[0].trajectory(self.game.tilemap, state)]
+                elif self.weapon in (1, 2):
+                    state = Grenade.trajectory_state(point_to_int(pos), mouse_pos, self.game.wind)
+                    trajectories = [self.trajectories[1].trajectory(self.game.tilemap, state)]
+                elif self.weapon == 3:
+                    # One path per rocket dropped above the target
+                    states = Airstrike.trajectory_states(mouse_pos, self.game.wind)
+                    trajectories = [cache.trajectory(self.game.tilemap, state)
+                                    for cache, state in zip(self.airstrike_trajectories, states)]
+
+                for trajectory in trajectories:
+                    radius = 4.5
+                    c = 255
+                    for point in trajectory:
+                        pygame.draw.circle(surf, (c, c, c), add_points(point, offset, sub=True), radius)
+                        radius = max(2, radius * 0.95)
+                        c = max(100, c * 0.97)
@@ -0,0 +1,28 @@
+from math import pi
+
+from scripts.features.rocket import Rocket
+
+
+class Airstrike:
+
+    image = 'rocket'
+    rockets = 5
+    spacing = 24  # pixels between the rockets
+    altitude = 320  # pixels above the target the rockets are dropped from
+    force = 60
+
+    @classmethod
+    def drop_points(cls, target):
+        """ Where the rockets are dropped, in a row above the target """
+        first = target[0] - (cls.rockets - 1) * cls.spacing / 2
+        return [(first + i * cls.spacing, target[1] - cls.altitude) for i in range(cls.rockets)]
+
+    @classmethod
+    def create(cls, target, game):
+        """ Rockets dropped in a row above the target, they hit any worm on their way """
+        return [Rocket(point, 3 * pi / 2, cls.force, game) for point in cls.drop_points(target)]
+
+    @classmethod
+    def trajectory_states(cls, target, wind):
+        """ Start state of each dropped rocket for Rocket.trajectory_segment, see TrajectoryCache """
+        return [(point, 3 * pi / 2, cls.force, tuple(wind)) for point in cls.drop_points(target)]
@@ -0,0 +1,191 @@
+from math import ceil
+
+import numpy as np
+
+from scripts.core.constants import FPS
+from scripts.core.tilemap import CELL_PHYSICS
+from scripts.features.grenade import Grenade
+from scripts.features.rocket import Rocket
+
+BATCH_BLOCK_STEPS = 60  # rocket steps integrated per block, the solver stops once every rocket hit
+ROCKET_LIFETIME = 10  # seconds, see Rocket.update
+GRENADE_FUSE = 5  # seconds, see Grenade.fuse
+GRENADE_CTO = 3  # collide trigger offset, see Grenade.collide
+GRAVITY = 9.8
+
+# Batched versions of the Rocket and Grenade physics for aim searches. Hits are found by sampling the
+# flights against the tile solidity grid at sub-tile intervals instead of an exact raycast, so impacts
+# can be off by a few pixels (and pixel terrain is seen as whole tiles): check the chosen shot with the
+# scalar physics when precision matters. Wind is the match average, the gusts of the WindField are not predicted.
+
+
+def solid_cells(tilemap):
+    """ Physics solidity of the tile grid as a boolean array, with an empty border standing for out of the grid """
+    grid = np.frombuffer(tilemap.solid_grid, dtype=np.uint8).reshape(tilemap.grid_height, tilemap.grid_width)
+    solid = np.zeros((tilemap.grid_height + 2, tilemap.grid_width + 2), dtype=bool)
+    solid[1:-1, 1:-1] = (grid & CELL_PHYSICS) != 0
+    return solid
+
+def aims(start, targets, max_force):
+    """ Angles and forces of shots from start aimed at the (N, 2) targets, like Rocket.aim and Grenade.aim """
+    targets = np.asarray(targets, dtype=np.float64).reshape(-1, 2)
+    vector = np.asarray(start, dtype=np.float64) - targets
+    angles = np.arctan2(-vector[:, 1], vector[:, 0]) % (2 * np.pi)
+    forces = np.minimum(np.hypot(vector[:, 0], vector[:, 1]), max_force)
+    return angles, forces
+
+def cells(tilemap, xs, ys):
+    """ Tile locations of the points """
+    return np.floor(xs / tilemap.tile_size).astype(np.int64), np.floor(ys / tilemap.tile_size).astype(np.int64)
+
+def is_cell_solid(tilemap, solid, cell_x, cell_y):
+    """ Solidity of the tile locations, out of the grid is empty """
+    # np.minimum/maximum rather than np.clip, whose wrapper costs more than the clipping on batch sized arrays
+    cell_x = np.minimum(np.maximum(cell_x - (tilemap.grid_origin[0] - 1), 0), tilemap.grid_width + 1)
+    cell_y = np.minimum(np.maximum(cell_y - (tilemap.grid_origin[1] - 1), 0), tilemap.grid_height + 1)
+    return solid[cell_y, cell_x]
+
+def is_solid(tilemap, solid, xs, ys):
+    """ Solidity of the points, out of the grid is empty """
+    return is_cell_solid(tilemap, solid, *cells(tilemap, xs, ys))
+
+def rocket_impacts(tilemap, start, angles, forces, wind, fps=FPS):
+    """ Explosion points (N, 2) and times (N,) of rockets fired from start at once """
+    solid = solid_cells(tilemap)
+    angles = np.asarray(angles, dtype=np.float64)
+    forces = np.asarray(forces, dtype=np.float64)
+    count = len(angles)
+    vel_x = (forces * np.cos(angles))[:, None]
+    vel_y = (-forces * np.sin(angles))[:, None]
+    acc_x = Rocket.wind_factor * wind[0]
+    acc_y = 0.5 * GRAVITY * Rocket.mass + Rocket.wind_factor * wind[1]
+
+    # Samples per step so that consecutive samples are at most half a tile apart
+    top_speed = np.max(np.hypot(np.abs(vel_x) + 2 * abs(acc_x) * ROCKET_LIFETIME,
+                                np.abs(vel_y) + 2 * abs(acc_y) * ROCKET_LIFETIME)) if count else 0
+    substeps = max(1, ceil(top_speed / fps / (tilemap.tile_size / 2)))
+    sample_time = 1 / (fps * substeps)
+    samples = int(ROCKET_LIFETIME * fps) * substeps
+
+    points = np.empty((count, 2))
+    times = np.full(count, np.inf)
+    pending = np.arange(count)
+    for first in range(0, samples + 1, BATCH_BLOCK_STEPS * substeps):
+        t = np.arange(first, min(first + BATCH_BLOCK_STEPS * substeps, samples + 1)) * sample_time
+        xs = start[0] + vel_x[pending] * t + acc_x * t ** 2
+        ys = start[1] + vel_y[pending] * t + acc_y * t ** 2
+        hits = is_solid(tilemap, solid, xs, ys)
+        hit_any = hits.any(axis=1)
+        first_hit = hits.argmax(axis=1)[hit_any]
+        hit = pending[hit_any]
+        points[hit, 0] = xs[hit_any, first_hit]
+        points[hit, 1] = ys[hit_any, first_hit]
+        times[hit] = t[first_hit]
+        pending = pending[~hit_any]
+        if not len(pending):
+            break
+
+    # Rockets that never hit explode at the end of their lifetime
+    t = ROCKET_LIFETIME
+    points[pending, 0] = start[0] + vel_x[pending, 0] * t + acc_x * t ** 2
+    points[pending, 1] = start[1] + vel_y[pending, 0] * t + acc_y * t ** 2
+    times[pending] = t
+    return points, times
+
+def bounce_grenades(tilemap, solid, hit, pos, probe, new_pos, vel):
+    """
+    Grenade.collide for the hit grenades, moving from pos to the solid probe point: find the tile face crossed
+    like the raycast would, push new_pos off it by the collide trigger offset and bounce vel
+    """
+    ts = tilemap.tile_size
+    index = np.flatnonzero(hit)
+    start, end = pos[index], probe[index]
+    move = end - start
+    old_x, old_y = cells(tilemap, start[:, 0], start[:, 1])
+    cell_x, cell_y = cells(tilemap, end[:, 0], end[:, 1])
+    # Faces entered when crossing to the probe cell, and the segment fraction where they are crossed
+    face_x = np.where(move[:, 0] > 0, cell_x * ts, (cell_x + 1) * ts)
+    face_y = np.where(move[:, 1] > 0, cell_y * ts, (cell_y + 1) * ts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac_x = np.minimum(np.maximum((face_x - start[:, 0]) / move[:, 0], 0), 1)
+        frac_y = np.minimum(np.maximum((face_y - start[:, 1]) / move[:, 1], 0), 1)
+    cross_x = cell_x != old_x
+    cross_y = cell_y != old_y
+    # Diagonal moves go through a corner cell first, the hit is there when it is solid
+    diagonal = cross_x & cross_y
+    x_first = diagonal & (frac_x < frac_y)
+    y_first = diagonal & ~x_first
+    corner_x_solid = is_cell_solid(tilemap, solid, cell_x, old_y)
+    corner_y_solid = is_cell_solid(tilemap, solid, old_x, cell_y)
+    wall = (cross_x & ~cross_y) | (x_first & corner_x_solid) | (y_first & ~corner_y_solid)
+    horizontal = (cross_y & ~cross_x) | (y_first & corner_y_solid) | (x_first & ~corner_x_solid)
+    inside = ~wall & ~horizontal  # started inside a tile
+
+    frac = np.where(wall, frac_x, frac_y)
+    frac[np.isnan(frac)] = 0  # no move along the axis
+    point = start + move * frac[:, None]
+    normal = np.zeros_like(move)
+    normal[wall, 0] = -np.sign(move[wall, 0])
+    normal[horizontal, 1] = -np.sign(move[horizontal, 1])
+    bounced = point + normal * GRENADE_CTO
+    point_inside = inside | (horizontal & (normal[:, 1] <= 0))  # floor and inside: avoid dancing on the floor
+    bounced[point_inside, 1] -= 1
+    new_pos[index] = bounced
+
+    falling = move[:, 1] > 0
+    vel_x, vel_y = vel[index, 0], vel[index, 1]
+    vel_x = np.where(wall, -np.sign(move[:, 0]) * np.abs(vel_x), vel_x)
+    vel_y = np.where(wall & falling, np.abs(vel_y), vel_y)
+    vel_y = np.where(horizontal & (normal[:, 1] > 0), np.abs(vel_y), vel_y)
+    vel_y = np.where(point_inside, -np.abs(vel_y), vel_y)
+    vel[index, 0] = vel_x * 0.6
+    vel[index, 1] = vel_y * 0.6
+
+class GrenadeBatch:
+    def __init__(self, tilemap, start, angles, forces, wind, fps=FPS):
+        self.tilemap = tilemap
+        self.solid = solid_cells(tilemap)
+        angles = np.asarray(angles, dtype=np.float64)
+        forces = np.asarray(forces, dtype=np.float64)
+        count = len(angles)
+        self.dt = 1 / fps
+        self.step = 0
+        self.steps = int(GRENADE_FUSE * fps)
+        self.acc = (Grenade.wind_factor * wind[0], 0.5 * GRAVITY * Grenade.mass + Grenade.wind_factor * wind[1])
+
+        # Each segment between bounces is a parabola from seg_start with the launch velocity vel, as in Grenade.update
+        self.seg_start = np.tile(np.asarray(start, dtype=np.float64), (count, 1))
+        self.vel = np.stack((forces * np.cos(angles), -forces * np.sin(angles)), axis=1)
+        self.seg_time = np.zeros(count)
+        self.pos = self.seg_start.copy()
+        self.first_bounce = np.full(count, np.inf)
+
+    def done(self):
+        return self.step >= self.steps
+
+    def advance(self, steps):
+        """ Integrate every grenade for up to steps more steps, so long batches can be spread over frames """
+        for _ in range(min(steps, self.steps - self.step)):
+            self.step += 1
+            self.seg_time += self.dt
+            new_pos = self.seg_start + self.vel * self.seg_time[:, None]
+            new_pos[:, 0] += self.acc[0] * self.seg_time ** 2
+            new_pos[:, 1] += self.acc[1] * self.seg_time ** 2
+            move = new_pos - self.pos
+            length = np.hypot(move[:, 0], move[:, 1])
+            length[length == 0] = 1
+            probe = new_pos + move / length[:, None] * GRENADE_CTO
+            hit = is_solid(self.tilemap, self.solid, probe[:, 0], probe[:, 1])
+
+            if hit.any():
+                self.first_bounce[hit & np.isinf(self.first_bounce)] = self.step * self.dt
+                bounce_grenades(self.tilemap, self.solid, hit, self.pos, probe, new_pos, self.vel)
+                self.seg_start[hit] = new_pos[hit]
+                self.seg_time[hit] = 0
+            self.pos = new_pos
+
+def grenade_impacts(tilemap, start, angles, forces, wind, fps=FPS):
+    """ Explosion points (N, 2) of grenades thrown from start at once, and the time of their first bounce (N,) """
+    batch = GrenadeBatch(tilemap, start, angles, forces, wind, fps)
+    batch.advance(batch.steps)
+    return batch.pos, batch.first_bounce
@@ -1,55 +1,99 @@
-import random
-
-import pygame
 from math import pi, atan2, sqrt, cos, sin
 
-from scripts.core.particle import Particle
-from scripts.core.utils import load_image, add_points
+from scripts.core.rotation import RotationCache
+from scripts.core.utils import add_points, lerp_points
 
 
 class Grenade:
 
+    image = 'grenade'
     mass = 20
+    wind_factor = 0.5  # heavier than a rocket
     max_force = 150
     damage = 50
+    damage_radius = 5  # tiles, see Simulation.damage_player
+    blast_radius = 4  # tiles removed around the explosion
+    fuse = 5  # seconds
+    explosion_particles = (100, 4)  # count and speed
+    explosion_shake = (40, 0.4)  # force and duration
 
     def __init__(self, pos, angle, force, game):
         self.start_pos = list(pos)
         self.angle = angle
         self.force = force
         self.time = 0
+        self.drift = [0, 0]  # wind displacement since the last bounce
+        self.drift_velocity = [0, 0]
         self.old_pos = list(pos)
         self.pos = list(pos)
-        self.image = load_image('weapons/grenade.png')
         self.rotation = 0
         self.rotation_force = int(15 * (self.force / 150))
-        self.timer = 5
+        self.timer = self.fuse
         self.collisions = {'top': False, 'bottom': False, 'left': False, 'right': False}
         self.game = game
 
     @classmethod
-    def create(cls, player_pos, mouse_pos, game):
+    def aim(cls, player_pos, mouse_pos):
+        """ Launch angle and force when aiming from player_pos at mouse_pos """
         vector = add_points(player_pos, mouse_pos, sub=True)
         angle = atan2(-vector[1], vector[0])
         if angle < 0:
             angle += 2 * pi
         force = min(sqrt(vector[0] ** 2 + vector[1] ** 2), cls.max_force)
-        return Grenade(player_pos, angle, force, game)
+        return angle, force
+
+    @classmethod
+    def create(cls, player_pos, mouse_pos, game):
+        angle, force = cls.aim(player_pos, mouse_pos)
+        return cls(player_pos, angle, force, game)
 
     @classmethod
-    def calculate_trajectory(cls, tilemap, player_pos, mouse_pos, fps):
+    def collide(cls, tilemap, old_pos, pos, vel_x, vel_y):
+        """
+        Cast the movement from old_pos to pos (extended by the collide trigger offset) against the tilemap
+        Returns None, or the hit point, the position pushed back out of the tile and the bounced velocity
+        """
         cto = 3  # collide trigger offset
-        vector = add_points(player_pos, mouse_pos, sub=True)
-        angle = atan2(-vector[1], vector[0])
-        if angle < 0:
-            angle += 2 * pi
-        force = min(sqrt(vector[0] ** 2 + vector[1] ** 2), cls.max_force)
-        start_pos = list(player_pos)
+        v = [pos[0] - old_pos[0], pos[1] - old_pos[1]]
+        length = sqrt(v[0] ** 2 + v[1] ** 2)
+        if length == 0:
+            return None
+        end_pos = (pos[0] + v[0] / length * cto, pos[1] + v[1] / length * cto)
+        hit = tilemap.raycast(old_pos, end_pos)
+        if not hit:
+            return None
+
+        point, normal = hit
+        new_pos = [point[0] + normal[0] * cto, point[1] + normal[1] * cto]
+        # If horizontaly, make sure to take the absolute value of vel_y if falling
+        # because of new angle 'atan2(-vel_y, vel_x)'
+        if normal[0] > 0:  # left
+            vel_x = abs(vel_x)
+            if v[1] > 0:
+                vel_y = abs(vel_y)
+        elif normal[0] < 0:  # right
+            vel_x = -abs(vel_x)
+            if v[1] > 0:
+                vel_y = abs(vel_y)
+        elif normal[1] > 0:  # top
+            vel_y = abs(vel_y)
+        else:  # bottom, or started inside a tile
+            new_pos[1] -= 1  # Avoid dancing on the floor
+            vel_y = -abs(vel_y)
+        return point, new_pos, vel_x, vel_y
 
+    @classmethod
+    def trajectory_state(cls, player_pos, mouse_pos, wind):
+        """ Start position, angle, force, life timer, preview point timer and wind """
+        angle, force = cls.aim(player_pos, mouse_pos)
+        return tuple(player_pos), angle, force, cls.fuse, 0.1, tuple(wind)
+
+    @classmethod
+    def trajectory_segment(cls, tilemap, state, fps):
+        """ Simulate until the next bounce, returns its points and the state after the bounce, see TrajectoryCache """
+        start_pos, angle, force, timer, point_timer, wind = state
         max_point_timer = 0.3
-        point_timer = 0.1
         time = 0
-        timer = 5
         trajectory = []
         pos = list(start_pos)
 
@@ -62,50 +106,15 @@ class Grenade:
             point_timer -= 1 / fps
 
             old_pos = list(pos)
-            pos[0] = start_pos[0] + vel_x * time
+            pos[0] = start_pos[0] + vel_x * time + cls.wind_factor * wind[0] * time ** 2
             pos[1] = start_pos[1] + (vel_y * time) + (
-                    0.5 * 9.8 * cls.mass * time ** 2)
-
-            v = [pos[0] - old_pos[0], pos[1] - old_pos[1]]
-            collision_pos = {}
-            collided = False
-            if v[0] < 0:
-                collision_pos["left"] = [pos[0] - cto, pos[1]]
-            elif v[0] > 0:
-                collision_pos["right"] = [pos[0] + cto, pos[1]]
-            if v[1] > 0:
-                collision_pos["bottom"] = [pos[0], pos[1] + cto]
-            elif v[1] < 0:
-                collision_pos["top"] = [pos[0], pos[1] - cto]
-
-            # Check collision
-            for p in collision_pos:
-                if tilemap.is_pos_in_tile(collision_pos[p]):
-
-                    point = tilemap.line_touch_tile(old_pos, collision_pos[p])
-                    if point:
-                        trajectory.append(list(point))
-
-                    collided = True
-                    if p == "left":
-                        vel_x = abs(vel_x)
-                        if v[1] > 0:
-                            vel_y = abs(vel_y)
-                    elif p == "right":
-                        vel_x = -abs(vel_x)
-                        if v[1] > 0:
-                            vel_y = abs(vel_y)
-
-                    if p == "top":
-                        vel_y = abs(vel_y)
-                    elif p == "bottom":
-                        pos[1] -= 1  # Avoid dancing on the floor
-                        vel_y = -abs(vel_y)
-
-            if collided:
-                start_pos = list(pos)
-                force *= 0.6
-                time = 0
+                    0.5 * 9.8 * cls.mass * time ** 2) + cls.wind_factor * wind[1] * time ** 2
+
+            # Check collision, a bounce ends the segment
+            collision = cls.collide(tilemap, old_pos, pos, vel_x, vel_y)
+            if collision:
+                point, pos, vel_x, vel_y = collision
+                trajectory.append(list(point))
                 angle = atan2(-vel_y, vel_x)
                 if angle < 0:
                     angle += 2 * pi
@@ -114,10 +123,21 @@ class Grenade:
                 point_timer = max_point_timer
                 trajectory.append(list(pos))
 
+            if collision:
+                return trajectory, (tuple(pos), angle, force * 0.6, timer, point_timer, wind)
+
+        return trajectory, None
+
+    @classmethod
+    def calculate_trajectory(cls, tilemap, wind, player_pos, mouse_pos, fps):
+        trajectory = []
+        state = cls.trajectory_state(player_pos, mouse_pos, wind)
+        while state is not None:
+            points, state = cls.trajectory_segment(tilemap, state, fps)
+            trajectory.extend(points)
         return trajectory
 
-    def update(self, fps):
-        cto = 3  # collide trigger offset
+    def update(self, fps, wind=None):
         vel_x = self.force * cos(self.angle)
         vel_y = -self.force * sin(self.angle)
 
@@ -130,18 +150,8 @@ class Grenade:
         # Grenade life timer
         self.timer -= 1 / fps
         if self.timer <= 0:
-            self.game.tilemap.remove_tiles_around(self.pos, radius=4)
-            self.game.damage_player(self.pos, radius=5)
-            self.game.change_player_transition()
-            # self.game.changing_turn = True
-            for _ in range(100):
-                r = 4
-                vx = random.uniform(-r, r)
-                vy = random.uniform(-r, r)
-                self.game.particles.append(Particle(self.game, "particle", (self.pos[0], self.pos[1]), (vx, vy)))
-            self.game.sfx['explosion'].play()
-            self.game.shake_screen(40, 0.4)
-            self.game.projectile = None
+            self.explode()
+            return
 
         # Time
         self.time += 1 / fps
@@ -149,87 +159,69 @@ class Grenade:
         # Saving old position
         self.old_pos[0] = self.pos[0]
         self.old_pos[1] = self.pos[1]
+        self.update_drift(fps, wind)
 
         # Compute new position
-        self.pos[0] = self.start_pos[0] + vel_x * self.time
+        self.pos[0] = self.start_pos[0] + vel_x * self.time + self.drift[0]
         self.pos[1] = self.start_pos[1] + (vel_y * self.time) + (
-                0.5 * 9.8 * self.mass * self.time ** 2)
-
-        # Vector between new and old position
-        v = [self.pos[0] - self.old_pos[0], self.pos[1] - self.old_pos[1]]
-
-        # Compute collision possibility horizontaly and verticaly
-        pos = list(self.pos)
-        collision_pos = {}
-        collided = False
-        if v[0] < 0:
-            collision_pos["left"] = [pos[0] - cto, pos[1]]
-        elif v[0] > 0:
-            collision_pos["right"] = [pos[0] + cto, pos[1]]
-        if v[1] > 0:
-            collision_pos["bottom"] = [pos[0], pos[1] + cto]
-        elif v[1] < 0:
-            collision_pos["top"] = [pos[0], pos[1] - cto]
-
-        # Check collision
-        for p in collision_pos:
-            if self.game.tilemap.is_pos_in_tile(collision_pos[p]):
-                collided = True
-                # If horizontaly, make sure to take the absolute value of vel_y if falling
-                # because of new angle 'atan2(-vel_y, vel_x)'
-                if p == "left":
-                    vel_x = abs(vel_x)
-                    if v[1] > 0:
-                        vel_y = abs(vel_y)
-                elif p == "right":
-                    vel_x = -abs(vel_x)
-                    if v[1] > 0:
-                        vel_y = abs(vel_y)
-
-                if p == "top":
-                    vel_y = abs(vel_y)
-                elif p == "bottom":
-                    self.pos[1] -= 1  # Avoid dancing on the floor
-                    vel_y = -abs(vel_y)
-
-        # If collided, compute new trajectory
-        if collided:
+                0.5 * 9.8 * self.mass * self.time ** 2) + self.drift[1]
+
+        # Check collision along the movement, if collided compute new trajectory
+        collision = self.collide(self.game.tilemap, self.old_pos, self.pos, vel_x, vel_y)
+        if collision:
+            _, self.pos, vel_x, vel_y = collision
             self.start_pos = list(self.pos)
             self.force *= 0.6
             self.time = 0
+            self.drift = [0, 0]
+            self.drift_velocity = [0, 0]
             self.angle = atan2(-vel_y, vel_x)
             if self.angle < 0:
                 self.angle += 2 * pi
             self.rotation_force = int(15 * (self.force / 150))
 
-            if self.force >= 10:
-                self.game.sfx['tap'].play()
-
-    def render(self, surf, offset):
-        img = self.image.copy()
-        img = pygame.transform.rotate(img, self.rotation)
-        surf.blit(img, (self.pos[0] - offset[0] - self.image.get_width() / 2,
-                               self.pos[1] - offset[1] - self.image.get_height() / 2))
-
-class Grenades:
-
-    def __init__(self, game):
-        self.game = game
-        self.grenades = []
-
-    def add_grenade(self, pos, mouse_pos):
-        self.grenades.append(Grenade.create(pos, mouse_pos))
+            self.game.emit('bounce', projectile=self, force=self.force)
 
-    def update(self, fps):
-        grenade_to_destroy = []
-        for i, grenade in enumerate(self.grenades):
-            grenade.update(self.game.tilemap, fps)
-            if grenade.timer <= 0:
-                grenade_to_destroy.append(i)
+    def update_drift(self, fps, wind=None):
+        """ Step the wind displacement with the wind where the grenade is, see Rocket.update_drift """
+        if wind is None:
+            wind = self.game.wind_at(self.pos)
+        for i in (0, 1):
+            self.drift[i] += self.drift_velocity[i] / fps + self.wind_factor * wind[i] / fps ** 2
+            self.drift_velocity[i] += 2 * self.wind_factor * wind[i] / fps
 
-        for index_grenade in grenade_to_destroy:
-            self.grenades.pop(index_grenade)
+    def explode(self):
+        removed = self.game.tilemap.remove_tiles_around(self.pos, radius=self.blast_radius, autotile=True)
+        self.game.damage_player(self.pos, self.damage_radius, self.damage)
+        self.game.emit('explosion', projectile=self, pos=self.pos, removed=removed)
+        self.game.remove_projectile(self)
 
     def render(self, surf, offset):
-        for grenade in self.grenades:
-            grenade.render(surf, offset)
\ No newline at end of file
+        image = self.game.assets[self.image]
+        img = RotationCache().rotate(image, self.rotation)
+        pos = lerp_points(self.old_pos, self.pos, self.game.interpolation)
+        surf.blit(img, (pos[0] - offset[0] - image.get_width() / 2,
+                               pos[1] - offset[1] - image.get_height() / 2))
+
+class ClusterGrenade(Grenade):
+
+    damage = 20
+    damage_radius = 3
+    bomblets = 5
+    bomblet_spread = 0.35  # radians between the bomblets, fanned upward
+    bomblet_force = 60
+
+    def explode(self):
+        super().explode()
+        for i in range(self.bomblets):
+            angle = pi / 2 + (i - (self.bomblets - 1) / 2) * self.bomblet_spread
+            self.game.add_projectile(Bomblet(self.pos, angle, self.bomblet_force, self.game))
+
+class Bomblet(Grenade):
+
+    damage = 15
+    damage_radius = 3
+    blast_radius = 2
+    fuse = 1.5
+    explosion_particles = (30, 2)
+    explosion_shake = (15, 0.15)
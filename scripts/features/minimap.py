@@ -1,6 +1,13 @@
-from pygame import Surface, mask, transform, SRCALPHA, draw
+from math import ceil
+
+from pygame import Surface, SRCALPHA, BLEND_RGBA_MAX, draw
 from scripts.core.tilemap import PHYSICS_TILES
 
+MINIMAP_BACKGROUND = (0, 0, 0, 180)
+MINIMAP_TILE = (255, 255, 255, 180)
+MINIMAP_PLAYER = (255, 0, 0, 180)
+MINIMAP_PLAYING = (0, 255, 0, 180)
+
 
 class Minimap:
     def __init__(self, game, pos, size, size_ratio=1, unzoom=1):
@@ -9,35 +16,60 @@ class Minimap:
         self.size = size
         self.size_ratio = size_ratio
         self.unzoom = unzoom
+        self.scale = 1 / (unzoom * size_ratio)  # minimap pixels per world pixel
+        # Minimap position of the world point at the render offset
+        self.center = (size[0] / size_ratio ** 2, size[1] / size_ratio ** 2)
+
+        self.display = Surface((size[0] / size_ratio, size[1] / size_ratio), SRCALPHA)
+        self.tilemap = None
+        self.terrain = None
+
+    def bake(self, tilemap):
+        """ Draw the physics tiles of the whole tile grid once, at the minimap resolution """
+        self.tilemap = tilemap
+        tile_size = tilemap.tile_size * self.scale
+        self.origin = (tilemap.grid_origin[0] * tile_size, tilemap.grid_origin[1] * tile_size)
+        self.terrain = Surface((ceil(tilemap.grid_width * tile_size), ceil(tilemap.grid_height * tile_size)), SRCALPHA)
+        for tile_type, _, x, y in tilemap.grid_tiles():
+            if tile_type in PHYSICS_TILES:
+                draw.rect(self.terrain, MINIMAP_TILE, self.tile_rect((x, y)))
 
-        self.display = Surface(size, SRCALPHA)
+    def tile_rect(self, loc):
+        """ Minimap pixels of the tile location, in the baked terrain """
+        tile_size = self.tilemap.tile_size * self.scale
+        left = round(loc[0] * tile_size - self.origin[0])
+        top = round(loc[1] * tile_size - self.origin[1])
+        return (left, top, round((loc[0] + 1) * tile_size - self.origin[0]) - left,
+                round((loc[1] + 1) * tile_size - self.origin[1]) - top)
+
+    def erase_tiles(self, locs):
+        """ Repaint the removed tile locations, see TileMap.remove_tiles_around """
+        if self.terrain is not None:
+            for loc in locs:
+                self.terrain.fill((0, 0, 0, 0), self.tile_rect(loc))
 
     def render(self, surf, offset=[0, 0]):
-        self.display.fill((0, 0, 0, 180))
+        if self.tilemap is not self.game.tilemap:
+            self.bake(self.game.tilemap)
+        self.display.fill(MINIMAP_BACKGROUND)
+
+        # Terrain, the transparent cells keeping the background
+        self.display.blit(self.terrain, (ceil(self.origin[0] - offset[0] * self.scale + self.center[0]),
+                                         ceil(self.origin[1] - offset[1] * self.scale + self.center[1])),
+                          special_flags=BLEND_RGBA_MAX)
 
+        # Players, drawn over the terrain every frame
         for i, player in enumerate(self.game.players):
-            color = (255, 0, 0, 180)
+            if player.health <= 0:
+                continue
+            color = MINIMAP_PLAYER
             if i == self.game.player_turn:
-                color = (0, 255, 0, 180)
-            draw.rect(self.display, color,
-                      ((player.pos[0] - offset[0]) / self.unzoom + self.size[0] / self.size_ratio,
-                       (player.pos[1] - offset[1]) / self.unzoom + self.size[1] / self.size_ratio,
-                       player.animation.img().get_width() / self.unzoom,
-                       player.animation.img().get_height() / self.unzoom))
-
-        for tile in self.game.tilemap.offgrid_tiles:
-            if tile['type'] in PHYSICS_TILES:
-                pass
-
-        for tile in self.game.tilemap.tilemap.values():
-            if tile['type'] in PHYSICS_TILES:
-                draw.rect(self.display, (255, 255, 255, 180),
-                          ((tile['pos'][0] * self.game.tilemap.tile_size - offset[0]) / self.unzoom + self.size[
-                              0] / self.size_ratio,
-                           (tile['pos'][1] * self.game.tilemap.tile_size - offset[1]) / self.unzoom + self.size[
-                               1] / self.size_ratio,
-                           self.game.tilemap.tile_size / self.unzoom,
-                           self.game.tilemap.tile_size / self.unzoom))
-
-        surf.blit(transform.scale(self.display, (self.size[0] / self.size_ratio, self.size[1] / self.size_ratio)),
-                  self.pos)
\ No newline at end of file
+                color = MINIMAP_PLAYING
+            img = player.animation.img()
+            left = ceil((player.pos[0] - offset[0]) * self.scale + self.center[0])
+            top = ceil((player.pos[1] - offset[1]) * self.scale + self.center[1])
+            right = ceil((player.pos[0] + img.get_width() - offset[0]) * self.scale + self.center[0])
+            bottom = ceil((player.pos[1] + img.get_height() - offset[1]) * self.scale + self.center[1])
+            draw.rect(self.display, color, (left, top, right - left, bottom - top))
+
+        surf.blit(self.display, self.pos)
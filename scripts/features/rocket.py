@@ -1,48 +1,61 @@
 import math
-import random
 
-import pygame
 from math import pi, atan2, sqrt, cos, sin, exp
 
-from scripts.core.utils import load_image, add_points
-from scripts.core.particle import Particle
+from scripts.core.rotation import RotationCache
+from scripts.core.utils import add_points, lerp_points
 
 
 class Rocket:
 
+    image = 'rocket'
     mass = 10
+    wind_factor = 1
     max_force = 300
     damage = 30
+    damage_radius = 3  # tiles, see Simulation.damage_player
+    blast_radius = 2  # tiles removed around the explosion
+    explosion_particles = (50, 2)  # count and speed
+    explosion_shake = (20, 0.2)  # force and duration
 
-    def __init__(self, pos, angle, force, game):
+    def __init__(self, pos, angle, force, game, owner=None):
         self.start_pos = list(pos)
         self.angle = angle
         self.force = force
         self.time = 0
         self.old_pos = list(pos)
         self.pos = list(pos)
-        self.image = load_image('weapons/rocket.png')
         self.rotation = 0
+        self.drift = [0, 0]  # wind displacement, integrated along the flight
+        self.drift_velocity = [0, 0]
         self.particles = []
         self.game = game
+        self.owner = owner  # worm the rocket flies through without exploding
 
     @classmethod
-    def create(cls, player_pos, mouse_pos, game):
+    def aim(cls, player_pos, mouse_pos):
+        """ Launch angle and force when aiming from player_pos at mouse_pos """
         vector = add_points(player_pos, mouse_pos, sub=True)
         angle = atan2(-vector[1], vector[0])
         if angle < 0:
             angle += 2 * pi
         force = min(sqrt(vector[0] ** 2 + vector[1] ** 2), cls.max_force)
-        return Rocket(player_pos, angle, force, game)
+        return angle, force
 
     @classmethod
-    def calculate_trajectory(cls, tilemap, wind, player_pos, mouse_pos, fps):
-        vector = add_points(player_pos, mouse_pos, sub=True)
-        angle = atan2(-vector[1], vector[0])
-        if angle < 0:
-            angle += 2 * pi
-        force = min(sqrt(vector[0] ** 2 + vector[1] ** 2), cls.max_force)
+    def create(cls, player_pos, mouse_pos, game, owner=None):
+        angle, force = cls.aim(player_pos, mouse_pos)
+        return cls(player_pos, angle, force, game, owner)
+
+    @classmethod
+    def trajectory_state(cls, player_pos, mouse_pos, wind):
+        angle, force = cls.aim(player_pos, mouse_pos)
+        return tuple(player_pos), angle, force, tuple(wind)
 
+    @classmethod
+    def trajectory_segment(cls, tilemap, state, fps):
+        """ Rockets fly in one segment, see TrajectoryCache """
+        player_pos, angle, force, wind = state
         vel_x = force * cos(angle)
         vel_y = -force * sin(angle)
         g = 9.8
@@ -58,8 +71,8 @@ class Rocket:
                 point_timer = 0.2
 
                 old_pos = list(pos)
-                pos[0] = player_pos[0] + vel_x * time + wind[0] * time ** 2
-                pos[1] = player_pos[1] + (vel_y * time) + (0.5 * g * cls.mass * time ** 2) + wind[1] * time ** 2
+                pos[0] = player_pos[0] + vel_x * time + cls.wind_factor * wind[0] * time ** 2
+                pos[1] = player_pos[1] + (vel_y * time) + (0.5 * g * cls.mass * time ** 2) + cls.wind_factor * wind[1] * time ** 2
 
                 point = tilemap.line_touch_tile((old_pos[0], old_pos[1]), (pos[0], pos[1]))
                 if point:
@@ -68,20 +81,24 @@ class Rocket:
 
                 trajectory.append(list(pos))
 
-        return trajectory
+        return trajectory, None
+
+    @classmethod
+    def calculate_trajectory(cls, tilemap, wind, player_pos, mouse_pos, fps):
+        return cls.trajectory_segment(tilemap, cls.trajectory_state(player_pos, mouse_pos, wind), fps)[0]
 
-    def update(self, fps):
+    def update(self, fps, wind=None):
         vel_x = self.force * cos(self.angle)
         vel_y = -self.force * sin(self.angle)
 
         self.time += 1 / fps
         self.old_pos[0] = self.pos[0]
         self.old_pos[1] = self.pos[1]
-        wind = self.game.wind
+        self.update_drift(fps, wind)
         g = 9.8
 
-        self.pos[0] = self.start_pos[0] + vel_x * self.time + wind[0] * self.time ** 2
-        self.pos[1] = self.start_pos[1] + (vel_y * self.time) + (0.5 * g * self.mass * self.time ** 2) + wind[1] * self.time ** 2
+        self.pos[0] = self.start_pos[0] + vel_x * self.time + self.drift[0]
+        self.pos[1] = self.start_pos[1] + (vel_y * self.time) + (0.5 * g * self.mass * self.time ** 2) + self.drift[1]
 
 
         v = [self.pos[0] - self.old_pos[0], self.pos[1] - self.old_pos[1]]
@@ -90,47 +107,37 @@ class Rocket:
         if self.rotation < 0:
             self.rotation += 360
 
-        if self.game.tilemap.is_pos_in_tile(self.pos) or self.time > 10:
-            self.game.tilemap.remove_tiles_around(self.pos, radius=2)
-            self.game.damage_player(self.pos, radius=3)
-            self.game.change_player_transition()
-            for _ in range(50):
-                r = 2
-                vx = random.uniform(-r, r)
-                vy = random.uniform(-r, r)
-                self.game.particles.append(Particle(self.game, "particle", (self.pos[0], self.pos[1]), (vx, vy)))
-            self.game.sfx['explosion'].play()
-            self.game.shake_screen(20, 0.2)
-            self.game.projectile = None
+        hit = self.game.tilemap.raycast(self.old_pos, self.pos)
+        if hit:
+            # Inside the hit tile, so that the explosion centers on it and not on the free tile before its face
+            self.pos = list(self.game.tilemap.hit_point_inside(hit))
+        worm_hit = self.game.worm_hit(self.old_pos, self.pos, ignore=self.owner)
+        if worm_hit:
+            self.pos = list(worm_hit)
+
+        if hit or worm_hit or self.time > 10:
+            self.explode()
+
+    def update_drift(self, fps, wind=None):
+        """ Step the wind displacement with the wind where the rocket is, w * t ** 2 under a uniform wind """
+        if wind is None:
+            wind = self.game.wind_at(self.pos)
+        for i in (0, 1):
+            self.drift[i] += self.drift_velocity[i] / fps + self.wind_factor * wind[i] / fps ** 2
+            self.drift_velocity[i] += 2 * self.wind_factor * wind[i] / fps
+
+    def explode(self):
+        removed = self.game.tilemap.remove_tiles_around(self.pos, radius=self.blast_radius, autotile=True)
+        self.game.damage_player(self.pos, self.damage_radius, self.damage)
+        self.game.emit('explosion', projectile=self, pos=self.pos, removed=removed)
+        self.game.remove_projectile(self)
 
     def render(self, surf, offset):
-        img = self.image.copy()
-        img = pygame.transform.rotate(img, self.rotation)
-        surf.blit(img, (self.pos[0] - offset[0] - self.image.get_width() / 2,
-                               self.pos[1] - offset[1] - self.image.get_height() / 2))
+        image = self.game.assets[self.image]
+        img = RotationCache().rotate(image, self.rotation)
+        pos = lerp_points(self.old_pos, self.pos, self.game.interpolation)
+        surf.blit(img, (pos[0] - offset[0] - image.get_width() / 2,
+                               pos[1] - offset[1] - image.get_height() / 2))
 
         for particule in self.particles:
             particule.render(surf, offset)
-
-class Rockets:
-
-    def __init__(self, game):
-        self.game = game
-        self.rockets = []
-
-    def add_rocket(self, pos, mouse_pos):
-        self.rockets.append(Rocket.create(pos, mouse_pos))
-
-    def update(self, fps):
-        rocket_to_destroy = []
-        for i, rocket in enumerate(self.rockets):
-            rocket.update(fps)
-            if self.game.tilemap.is_pos_in_tile(rocket.pos):
-                rocket_to_destroy.append(i)
-
-        for index_rocket in rocket_to_destroy:
-            self.rockets.pop(index_rocket)
-
-    def render(self, surf, offset):
-        for rocket in self.rockets:
-            rocket.render(surf, offset)
\ No newline at end of file
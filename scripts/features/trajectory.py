@@ -0,0 +1,59 @@
+TRAJECTORY_DECIMALS = 3  # rounding of the segment start states used as cache keys
+
+
+def state_key(state):
+    """ Hashable key of a segment start state, floats rounded so sub-pixel jitter (camera scroll) still hits """
+    key = []
+    for value in state:
+        if isinstance(value, (list, tuple)):
+            key.append(state_key(value))
+        elif isinstance(value, float):
+            key.append(round(value, TRAJECTORY_DECIMALS))
+        else:
+            key.append(value)
+    return tuple(key)
+
+
+class TrajectoryCache:
+    def __init__(self, simulate, fps):
+        # simulate(tilemap, state, fps) returns the points of one segment (until a bounce)
+        # and the start state of the next segment, None when the trajectory ends
+        self.simulate = simulate
+        self.fps = fps
+        self.segments = []  # [key, points, next state]
+        self.version = None
+        self.first_key = None
+        self.points = []
+
+    def trajectory(self, tilemap, state):
+        """ Preview points from the start state, recomputing only the segments whose start state changed """
+        key = state_key(state)
+        if tilemap.version != self.version:
+            self.segments = []
+            self.version = tilemap.version
+        elif key == self.first_key:
+            return self.points
+
+        points = []
+        i = 0
+        while state is not None:
+            if i < len(self.segments) and self.segments[i][0] == key:
+                _, segment_points, state = self.segments[i]
+            else:
+                # Diverged: replace this segment only, the following ones are kept in case the path joins them again
+                segment_points, next_state = self.simulate(tilemap, state, self.fps)
+                segment = [key, segment_points, next_state]
+                if i < len(self.segments):
+                    self.segments[i] = segment
+                else:
+                    self.segments.append(segment)
+                state = next_state
+            points.extend(segment_points)
+            i += 1
+            if state is not None:
+                key = state_key(state)
+        del self.segments[i:]
+
+        self.first_key = self.segments[0][0] if self.segments else None
+        self.points = points
+        return points
@@ -0,0 +1,112 @@
+from math import ceil, floor
+
+import numpy as np
+import pygame
+
+WIND_CELL = 128  # world pixels between the field nodes
+WIND_GUSTINESS = 0.3  # gust strength, as a share of the max wind
+WIND_GUST_SECONDS = 3  # time scale over which the gusts change
+WIND_UPDATE_SECONDS = 0.1  # the gusts are eased in steps of this much time
+WIND_MARGIN = 512  # world pixels the field extends past the tile grid, beyond it the edge nodes apply
+WIND_STREAKS = 20
+STREAK_COLOR = (255, 255, 255)
+
+
+# Wind over the map: the match wind plus gusts, stored on a coarse grid of nodes and bilinearly sampled
+class WindField:
+    def __init__(self, base, tilemap, max_wind, rng, cell=WIND_CELL):
+        self.base = np.asarray(base, dtype=np.float64)
+        self.rng = rng
+        self.cell = cell
+        self.gust = max_wind * WIND_GUSTINESS
+
+        tile_size = tilemap.tile_size
+        self.origin = (tilemap.grid_origin[0] * tile_size - WIND_MARGIN, tilemap.grid_origin[1] * tile_size - WIND_MARGIN)
+        self.width = max(2, ceil((tilemap.grid_width * tile_size + WIND_MARGIN * 2) / cell) + 1)
+        self.height = max(2, ceil((tilemap.grid_height * tile_size + WIND_MARGIN * 2) / cell) + 1)
+
+        self.gusts = self.rng.normal(0, self.gust, (self.height, self.width, 2))
+        self.targets = self.rng.normal(0, self.gust, (self.height, self.width, 2))
+        self.nodes = self.base + self.gusts
+        self.elapsed = 0
+
+    def step(self, dt):
+        """ Gusts ease towards their targets, each node getting a new target every WIND_GUST_SECONDS on average """
+        self.elapsed += dt
+        if not self.gust or self.elapsed < WIND_UPDATE_SECONDS:
+            return
+        dt, self.elapsed = self.elapsed, 0
+        redraw = self.rng.integers(0, self.width * self.height, self.rng.poisson(self.width * self.height * dt / WIND_GUST_SECONDS))
+        self.targets.reshape(-1, 2)[redraw] = self.rng.normal(0, self.gust, (len(redraw), 2))
+        self.gusts += (self.targets - self.gusts) * (dt / WIND_GUST_SECONDS)
+        np.add(self.base, self.gusts, out=self.nodes)
+
+    def at(self, pos):
+        """ Wind at a world position """
+        fx = min(max((pos[0] - self.origin[0]) / self.cell, 0), self.width - 1)
+        fy = min(max((pos[1] - self.origin[1]) / self.cell, 0), self.height - 1)
+        x = min(floor(fx), self.width - 2)
+        y = min(floor(fy), self.height - 2)
+        tx = fx - x
+        ty = fy - y
+        node = self.nodes.item
+        return [(node(y, x, i) * (1 - tx) + node(y, x + 1, i) * tx) * (1 - ty) +
+                (node(y + 1, x, i) * (1 - tx) + node(y + 1, x + 1, i) * tx) * ty for i in (0, 1)]
+
+    def sample(self, points):
+        """ Wind at the (N, 2) world positions, as an (N, 2) array """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        fx = np.clip((points[:, 0] - self.origin[0]) / self.cell, 0, self.width - 1)
+        fy = np.clip((points[:, 1] - self.origin[1]) / self.cell, 0, self.height - 1)
+        x = np.minimum(fx.astype(np.int64), self.width - 2)
+        y = np.minimum(fy.astype(np.int64), self.height - 2)
+        tx = (fx - x)[:, None]
+        ty = (fy - y)[:, None]
+        nodes = self.nodes
+        return ((nodes[y, x] * (1 - tx) + nodes[y, x + 1] * tx) * (1 - ty) +
+                (nodes[y + 1, x] * (1 - tx) + nodes[y + 1, x + 1] * tx) * ty)
+
+# Wind streaks over the screen, moved by the wind under them and wrapping around
+class WindStreaks:
+    def __init__(self, size, count=WIND_STREAKS, rng=None):
+        self.size = np.array(size, dtype=np.float64)
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.pos = self.rng.uniform(0, 1, (count, 2)) * self.size
+        self.wind = np.zeros((count, 2))
+
+    def update(self, field, scroll):
+        self.wind = field.sample(self.pos + scroll)
+        self.pos += self.wind / 2
+
+        # Streaks leaving a side come back from the opposite one, anywhere along it
+        for axis in (0, 1):
+            out = (self.pos[:, axis] < 0) | (self.pos[:, axis] > self.size[axis])
+            if out.any():
+                self.pos[out, axis] = np.where(self.pos[out, axis] < 0, self.size[axis], 0)
+                self.pos[out, 1 - axis] = self.rng.uniform(0, self.size[1 - axis], np.count_nonzero(out))
+
+    def render(self, surf):
+        """ Rasterize every streak, a 2 pixel wide line along its wind, in one pass """
+        width, height = surf.get_size()
+        end = self.pos + self.wind / 2
+        # Only the streaks crossing the surface
+        visible = ((np.maximum(self.pos[:, 0], end[:, 0]) >= 0) & (np.minimum(self.pos[:, 0], end[:, 0]) < width) &
+                   (np.maximum(self.pos[:, 1], end[:, 1]) >= 0) & (np.minimum(self.pos[:, 1], end[:, 1]) < height))
+        if not visible.any():
+            return
+        pos = self.pos[visible].astype(np.float32)
+        tail = (end[visible] - self.pos[visible]).astype(np.float32)
+
+        # One sample per pixel along the longest streak
+        steps = max(1, ceil(np.abs(tail).max()))
+        t = np.linspace(0, 1, steps + 1, dtype=np.float32)
+        xs = (pos[:, 0, None] + tail[:, 0, None] * t).astype(np.int32)
+        ys = (pos[:, 1, None] + tail[:, 1, None] * t).astype(np.int32)
+        # Thicken across the line direction
+        flat = (np.abs(tail[:, 0]) >= np.abs(tail[:, 1]))[:, None]
+        xs = np.concatenate((xs, xs + ~flat), axis=1).ravel()
+        ys = np.concatenate((ys, ys + flat), axis=1).ravel()
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        pixels = pygame.surfarray.pixels2d(surf)
+        pixels[xs[inside], ys[inside]] = surf.map_rgb(STREAK_COLOR)
+        del pixels
@@ -1,19 +1,25 @@
 import math
 import sys
-from time import time
-from random import random, randint, choice, uniform
+from time import perf_counter
+from random import random, choice
 
 from scripts.core.animation import Animation
+from scripts.core.assets import Assets
 from scripts.core.constants import *
 from scripts.core.font import Font
-from scripts.core.particle import Particle
+from scripts.core.particle import ParticleSystem
+from scripts.core.profiler import Profiler, PROFILER_KEY
+from scripts.core.telemetry import Telemetry
 from scripts.core.utils import *
-from scripts.entities.player import Player
+from scripts.entities.bot import Bot
+from scripts.entities.player import WEAPONS
 from scripts.features.minimap import Minimap
 from scripts.features.timer import Timer
+from scripts.features.wind import WindStreaks
 from scripts.menu import  Menu
+from scripts.simulation import Simulation
 
-class Game:
+class Game(Simulation):
     # ===== SINGLETON =====
     __instance = None
 
@@ -26,6 +32,10 @@ class Game:
     def __init__(self):
         if (self.__initialized): return
         self.__initialized = True
+        super().__init__()
+        self.subscribe(self.on_event)
+        self.profiler = Profiler()  # disabled until toggled
+        self.bot_teams = list(BOT_TEAMS)  # see main.py --bot
 
         pygame.init()
         pygame.font.init()
@@ -35,43 +45,49 @@ class Game:
         self.screen = pygame.display.set_mode(SCREEN_SIZE)
         self.display = pygame.Surface((SCREEN_SIZE[0] // self.render_scale, SCREEN_SIZE[1] // self.render_scale))
         self.clock = pygame.time.Clock()
-        self.target_fps = TARGET_FPS
         self.fps = FPS
-        self.delta_time = 0
         self.menu = Menu(self)
         self.font = Font('data/fonts/large_font.png', scale=4)
+        self.profiler_font = Font('data/fonts/large_font.png')
+        self.telemetry = None
+        if TELEMETRY_PATH:
+            self.telemetry = Telemetry(TELEMETRY_PATH)
+            self.subscribe(self.telemetry.on_event)
+            self.profiler.set_recording(True)
 
 
     def init_game(self, map):
         self.weapon_overlay = pygame.Surface((64, 64))
+        assets = Assets()
+        frames = assets.atlas(['tiles', 'entities', 'particles'], packed=TEXTURE_ATLAS)
         self.assets = {
-            'bg': load_image('background.png'),
-            'projectile': load_image('projectile.png'),
-
-            'decor': load_images('tiles/decor'),
-            'grass': load_images('tiles/grass'),
-            'large_decor': load_images('tiles/large_decor'),
-            'spawners': load_images('tiles/spawners'),
-            'stone': load_images('tiles/stone'),
-
-            'player0/idle': Animation(load_images('entities/player0/idle'), 6),
-            'player0/run': Animation(load_images('entities/player0/run'), 4),
-            'player0/jump': Animation(load_images('entities/player0/jump')),
-
-            'player1/idle': Animation(load_images('entities/player1/idle'), 6),
-            'player1/run': Animation(load_images('entities/player1/run'), 4),
-            'player1/jump': Animation(load_images('entities/player1/jump')),
-
-            'parachute': load_image('weapons/parachute.png'),
-            'rocket': load_image('weapons/rocket.png'),
-            'grenade': load_image('weapons/grenade.png'),
-            'weapon_frame_border': load_image('overlays/frame_border.png'),
-
-            'particles/particle': Animation(load_images('particles/particle'), 8, loop=False),
-            'particles/blood': Animation(load_images('particles/blood'), 12, loop=False),
+            'bg': pygame.transform.scale(assets.image('background.png'), self.display.get_size()),
+            'projectile': assets.image('projectile.png'),
+
+            'decor': frames['tiles/decor'],
+            'grass': frames['tiles/grass'],
+            'large_decor': frames['tiles/large_decor'],
+            'spawners': frames['tiles/spawners'],
+            'stone': frames['tiles/stone'],
+
+            'player0/idle': Animation(frames['entities/player0/idle'], 6),
+            'player0/run': Animation(frames['entities/player0/run'], 4),
+            'player0/jump': Animation(frames['entities/player0/jump']),
+
+            'player1/idle': Animation(frames['entities/player1/idle'], 6),
+            'player1/run': Animation(frames['entities/player1/run'], 4),
+            'player1/jump': Animation(frames['entities/player1/jump']),
+
+            'parachute': assets.image('weapons/parachute.png'),
+            'rocket': assets.image('weapons/rocket.png'),
+            'grenade': assets.image('weapons/grenade.png'),
+            'weapon_frame_border': assets.image('overlays/frame_border.png'),
+
+            'particles/particle': Animation(frames['particles/particle'], 8, loop=False),
+            'particles/blood': Animation(frames['particles/blood'], 12, loop=False),
         }
         self.menu_assets = {
-            'main_menu': pygame.transform.scale_by(load_image('menu/main_menu.png', colorkey=None, alpha=True), 3),
+            'main_menu': pygame.transform.scale_by(assets.image('menu/main_menu.png', colorkey=None, alpha=True), 3),
         }
         self.menu_rects = {
             'main_menu': pygame.Rect((SCREEN_SIZE[0] // 2 - self.menu_assets['main_menu'].get_width() // 2,
@@ -80,180 +96,262 @@ class Game:
         }
 
         self.musics = {
-            'potato': pygame.mixer.Sound(MUSIC_PATH + 'potato.wav'),
-            'time_for_adventure': pygame.mixer.Sound(MUSIC_PATH + 'time_for_adventure.mp3'),
+            'potato': assets.sound(MUSIC_PATH + 'potato.wav', 0.2),
+            'time_for_adventure': assets.sound(MUSIC_PATH + 'time_for_adventure.mp3', 0.2),
         }
-        self.musics['potato'].set_volume(0.2)
-        self.musics['time_for_adventure'].set_volume(0.2)
         self.music = self.musics[choice(list(self.musics.keys()))]
 
         self.sfx = {
-            'ambience': pygame.mixer.Sound(SFX_PATH + 'ambience.wav'),
-            'menu_click': pygame.mixer.Sound(SFX_PATH + 'jump.wav'),
-            'hurt': pygame.mixer.Sound(SFX_PATH + 'hurt.wav'),
-            'tap': pygame.mixer.Sound(SFX_PATH + 'tap.wav'),
-            'explosion': pygame.mixer.Sound(SFX_PATH + 'explosion.wav'),
-            'parachute': pygame.mixer.Sound(SFX_PATH + 'parachute.wav'),
-            'jump': pygame.mixer.Sound(SFX_PATH + 'jump.wav'),
-            'footstep': pygame.mixer.Sound(SFX_PATH + 'footstep.wav'),
-            'victory': pygame.mixer.Sound(SFX_PATH + 'victory.wav'),
+            'ambience': assets.sound(SFX_PATH + 'ambience.wav', 0.2),
+            'menu_click': assets.sound(SFX_PATH + 'jump.wav', 0.1),
+            'hurt': assets.sound(SFX_PATH + 'hurt.wav', 2),
+            'tap': assets.sound(SFX_PATH + 'tap.wav', 0.5),
+            'explosion': assets.sound(SFX_PATH + 'explosion.wav', 0.1),
+            'parachute': assets.sound(SFX_PATH + 'parachute.wav', 0.5),
+            'jump': assets.sound(SFX_PATH + 'jump.wav', 0.6),
+            'footstep': assets.sound(SFX_PATH + 'footstep.wav', 0.4),
+            'victory': assets.sound(SFX_PATH + 'victory.wav', 0.5),
         }
-        self.sfx['ambience'].set_volume(0.2)
-        self.sfx['menu_click'].set_volume(0.1)
-        self.sfx['explosion'].set_volume(0.1)
-        self.sfx['tap'].set_volume(0.5)
-        self.sfx['hurt'].set_volume(2)
-        self.sfx['parachute'].set_volume(0.5)
-        self.sfx['jump'].set_volume(0.6)
-        self.sfx['footstep'].set_volume(0.4)
-        self.sfx['victory'].set_volume(0.5)
-
-        self.players = [
-            Player(self, (0, 0), (8, 15), 0),
-            Player(self, (0, 0), (8, 15), 1),
-        ]
-        self.winner = None
-        self.projectile = None
-        self.particles = []
-        self.wind_particles = []
-        for _ in range(20):
-            x = randint(0, SCREEN_SIZE[0])
-            y = randint(0, SCREEN_SIZE[1])
-            self.wind_particles.append([x, y])
+
+        self.particles = ParticleSystem(self)
+        self.wind_streaks = WindStreaks(SCREEN_SIZE)
 
         self.mouse_pos = [0, 0]
-        self.movement = [[False, False], [False, False]]
         self.scroll = [0, 0]
         self.screenshake = 0
         self.screenshake_timer = 0
-        self.player_turn = 0
         self.zoom = 1
-        self.changing_turn = False
-        self.changing_turn_timer = 2
-        self.wind = [randint(-50, 51), randint(-50, 51)]
         self.minimap = Minimap(self, (8, 8), SCREEN_SIZE, 8, 1)
-        pygame.time.set_timer(pygame.USEREVENT, 1000)
-        self.timer = Timer(30, (64, 64))
+        self.interpolation = 1
+        self.timer = Timer(TURN_SECONDS, (64, 64))
         self.victory_music = False
         self.load_level(map)
 
     def load_level(self, map):
-        self.tilemap = load_map(self, map)
+        super().load_level(map, PIXEL_TERRAIN)
+        self.bots = [Bot(self, team) for team in self.bot_teams]
         self.music.play(-1)
         self.sfx['ambience'].play(-1)
-        self.player_turn = 0
-        self.players[0].air_time = 0
         self.scroll = [0, 0]
         self.screenshake = 0
 
-        for spawner in self.tilemap.extract([('spawners', 0), ('spawners', 1)]):
-            if spawner['variant'] == 0:
-                self.players[0].pos = spawner['pos']
-            elif spawner['variant'] == 1:
-                self.players[1].pos = spawner['pos']
-
         self.scroll[0] = self.players[self.player_turn].rect().centerx - self.display.get_width() / 2
         self.scroll[1] = self.players[self.player_turn].rect().centery - self.display.get_height() / 2
+        self.prev_scroll = list(self.scroll)
+        if self.telemetry:
+            self.telemetry.send({'type': 'level', 'map': map, 'worms': len(self.players), 'bots': self.bot_teams,
+                                 'assets': Assets().group_stats()})
+
+    def is_human_playing(self):
+        return self.is_playing() and self.players[self.player_turn].number not in self.bot_teams
+
+    def telemetry_metrics(self):
+        """ Metrics of the last frame streamed by the telemetry """
+        width, height = self.display.get_size()
+        return {
+            'step': self.steps,
+            'particles': len(self.particles),
+            'tiles': self.tilemap.tile_count_in_area(self.scroll[0], self.scroll[1], self.scroll[0] + width, self.scroll[1] + height),
+            'projectiles': [[type(projectile).__name__, round(projectile.pos[0], 1), round(projectile.pos[1], 1)]
+                            for projectile in self.projectiles],
+        }
 
-    def is_playing(self):
-        return not (self.projectile or self.changing_turn or self.winner is not None)
-
-    def change_player_transition(self):
-        self.changing_turn_timer = 2
-        self.changing_turn = True
-        self.players[self.player_turn].charge_shooting = False
-        self.movement = [[False, False], [False, False], ]
-
-    def change_player_turn(self):
-        self.changing_turn_timer = 2
-        self.changing_turn = False
-        self.timer.reset()
-        self.player_turn = (self.player_turn + 1) % 2
-
-    def damage_player(self, pos, radius=1):
-        for i, player in enumerate(self.players):
-            v = (player.pos[0] - pos[0]), (player.pos[1] - pos[1])
-            r = radius * self.tilemap.tile_size
-            if v[0] ** 2 + v[1] ** 2 <= r ** 2:
-                l = math.sqrt(v[0]**2 + v[1]**2)
-                ratio = 1 - (l / r)
-                player.health -= self.projectile.damage * ratio
-                self.sfx['hurt'].play()
-                for _ in range(7):
-                    r = 1
-                    vx = uniform(-r, r)
-                    vy = uniform(-r, r)
-                    self.particles.append(Particle(self, "blood", player.pos, (vx, vy)))
-
-    def kill_player(self, player):
-        player.health = 0
-        for _ in range(50):
-            r = 3
-            vx = uniform(-r, r)
-            vy = uniform(-r, r)
-            self.particles.append(Particle(self, "blood", player.pos, (vx, vy)))
-
-    def check_player_death(self):
-        for i, player in enumerate(self.players):
-            if player.health <= 0:
-                self.kill_player(player)
-                self.winner = (i + 1) % 2
-                return True
-        return False
+    def telemetry_details(self):
+        """ State of the last frame kept by the telemetry flight recorder """
+        return {
+            'turn': self.player_turn,
+            'players': [[player.number, round(player.pos[0], 1), round(player.pos[1], 1), round(player.health, 1)]
+                        for player in self.players],
+            'scroll': [round(self.scroll[0], 1), round(self.scroll[1], 1)],
+            'phases': self.profiler.frame_phases(),
+        }
+
+    def on_event(self, event, data):
+        """ Sounds, particles and screenshake of the simulation events """
+        if event in ('jump', 'footstep', 'parachute'):
+            self.sfx[event].play()
+        elif event == 'fall':
+            self.sfx['hurt'].play()
+            self.shake_screen(60, 0.2)
+        elif event == 'hurt':
+            self.sfx['hurt'].play()
+            self.particles.burst("blood", data['player'].pos, 7, 1)
+        elif event == 'death':
+            self.particles.burst("blood", data['player'].pos, 50, 3)
+        elif event == 'bounce':
+            if data['force'] >= 10:
+                self.sfx['tap'].play()
+        elif event == 'explosion':
+            projectile = data['projectile']
+            self.particles.burst("particle", data['pos'], *projectile.explosion_particles)
+            self.sfx['explosion'].play()
+            self.shake_screen(*projectile.explosion_shake)
+            self.minimap.erase_tiles(data['removed'])
+        elif event == 'countdown':
+            self.timer.countdown()
+        elif event == 'turn':
+            self.timer.reset()
 
     def shake_screen(self, force, duration):
         self.screenshake_timer = duration
         self.screenshake = force
 
+    def render_camera(self, screenshake=(0, 0)):
+        """ Zoom the display on the screen center, scaling only the display area that ends up on screen """
+        size = (int(SCREEN_SIZE[0] * self.zoom), int(SCREEN_SIZE[1] * self.zoom))
+        dest = (
+            int(-((self.zoom - 1) * SCREEN_SIZE[0] / 2) + screenshake[0]),
+            int(-((self.zoom - 1) * SCREEN_SIZE[1] / 2) + screenshake[1])
+        )
+        scale = (size[0] / self.display.get_width(), size[1] / self.display.get_height())
+        # Whole display pixels covering the screen, placed where the full frame scale would put them
+        left = max(0, math.floor(-dest[0] / scale[0]))
+        top = max(0, math.floor(-dest[1] / scale[1]))
+        right = min(self.display.get_width(), math.ceil((SCREEN_SIZE[0] - dest[0]) / scale[0]))
+        bottom = min(self.display.get_height(), math.ceil((SCREEN_SIZE[1] - dest[1]) / scale[1]))
+        view = self.display.subsurface((left, top, right - left, bottom - top))
+        view_pos = (round(left * scale[0]), round(top * scale[1]))
+        view_size = (round(right * scale[0]) - view_pos[0], round(bottom * scale[1]) - view_pos[1])
+        self.screen.blit(pygame.transform.scale(view, view_size), (dest[0] + view_pos[0], dest[1] + view_pos[1]))
+
+    def step(self):
+        """ Advance the simulation by one fixed step of 1 / FPS seconds, with the camera and effects """
+        # Camera
+        self.prev_scroll = list(self.scroll)
+        if not self.changing_turn:
+            if self.projectiles:
+                self.scroll[0] += (self.projectiles[0].pos[0] - self.display.get_width() / 2 -
+                                   self.scroll[0]) / 10
+                self.scroll[1] += (self.projectiles[0].pos[1] - self.display.get_height() / 2 -
+                                   self.scroll[1]) / 10
+            else:
+                self.scroll[0] += (self.players[self.player_turn].rect().centerx - self.display.get_width() / 2 -
+                                   self.scroll[0]) / 10
+                self.scroll[1] += (self.players[self.player_turn].rect().centery - self.display.get_height() / 2 -
+                                   self.scroll[1]) / 10
+
+        # Zoom
+        if self.projectiles or self.winner is not None:
+            self.zoom = min(1.8, self.zoom + 0.1)
+        elif not self.changing_turn:
+            self.zoom = max(1, self.zoom - 0.1)
+
+        super().step()
+        self.profiler.lap('simulation')
+
+        # Wind
+        self.wind_streaks.update(self.wind_field, self.scroll)
+        self.profiler.lap('wind')
+
+        # Particles
+        self.particles.update()
+        self.profiler.lap('particles')
+
+        # Screenshake
+        if self.screenshake_timer > 0:
+            self.screenshake_timer -= 1 / FPS
+        else:
+            self.screenshake_timer = 0
+            self.screenshake = 0
+
+    def render(self):
+        """ Draw the state between the last two steps, at self.interpolation """
+        render_scroll = point_to_int(lerp_points(self.prev_scroll, self.scroll, self.interpolation))
+
+        # Background
+        self.display.blit(self.assets['bg'], (0, 0))
+
+        # Tilemap
+        self.tilemap.render(self.display, offset=render_scroll)
+        self.profiler.lap('draw tilemap')
+
+        # Player
+        for player in self.players:
+            player.render(self.display, offset=render_scroll)
+
+        # Projectile
+        for projectile in self.projectiles:
+            projectile.render(self.display, offset=render_scroll)
+        self.profiler.lap('draw entities')
+
+        # Playing
+        if self.is_playing():
+            # Timer
+            self.timer.render(self.display, (10, 406))
+
+            # Weapon type
+            self.weapon_overlay.fill((0, 0, 0))
+            weapon_img = self.assets[WEAPONS[self.players[self.player_turn].weapon].image]
+            self.weapon_overlay.blit(pygame.transform.scale(weapon_img, (32, 32)), (16, 16))
+            self.weapon_overlay.blit(self.assets["weapon_frame_border"], (0, 0))
+            self.display.blit(self.weapon_overlay, (80, 406))
+            self.profiler.lap('draw hud')
+
+            # Minimap
+            self.minimap.render(self.display, render_scroll)
+            self.profiler.lap('draw minimap')
+
+        # Wind
+        self.wind_streaks.render(self.display)
+
+        # Particles
+        self.particles.render(self.display, render_scroll)
+        self.profiler.lap('draw effects')
+
+        # Display
+        screenshake = ((random() * self.screenshake - self.screenshake / 2), (random() * self.screenshake - self.screenshake / 2))
+        self.render_camera(screenshake)
+        self.profiler.lap('scale')
+
+        if self.winner is not None and not self.changing_turn:
+            if not self.victory_music:
+                self.music.stop()
+                self.sfx['victory'].play()
+                self.victory_music = True
+            self.font.render(self.screen, f"Winner is player {self.winner + 1}", (SCREEN_SIZE[0] // 2, SCREEN_SIZE[1] // 2 - 120), center=True, bg=(0, 0, 0))
+            self.screen.blit(self.menu_assets['main_menu'], self.menu_rects['main_menu'])
+
+        # Profiler
+        self.profiler.render(self.screen, self.profiler_font, self.fps)
+        self.profiler.lap('overlay')
+
     def run(self):
-        prev_time = time()
+        prev_time = perf_counter()
+        accumulator = 0
         while True:
             if self.menu.running:
                 self.menu.run()
                 pygame.display.update()
                 self.clock.tick(FPS)
+                prev_time = perf_counter()
                 continue
 
-            # DELTA TIME
-            self.delta_time = (time() - prev_time) * self.target_fps
-            prev_time = time()
+            # FIXED TIMESTEP: the simulation runs at FPS whatever the frame rate, at most MAX_FRAME_STEPS per frame
+            now = perf_counter()
+            frame_time = now - prev_time
+            accumulator = min(accumulator + frame_time, MAX_FRAME_STEPS / FPS)
+            prev_time = now
+            if self.telemetry:
+                self.telemetry.record_frame(frame_time, self.telemetry_metrics(), self.telemetry_details())
+            self.profiler.start_frame()
 
             # Get mouse pos
             self.mouse_pos = list(pygame.mouse.get_pos())
             self.mouse_pos[0] //= self.render_scale
             self.mouse_pos[1] //= self.render_scale
 
-            # Camera
-            if not self.changing_turn:
-                if self.projectile:
-                    self.scroll[0] += (self.projectile.pos[0] - self.display.get_width() / 2 -
-                                       self.scroll[0]) / 10
-                    self.scroll[1] += (self.projectile.pos[1] - self.display.get_height() / 2 -
-                                       self.scroll[1]) / 10
-                else:
-                    self.scroll[0] += (self.players[self.player_turn].rect().centerx - self.display.get_width() / 2 -
-                                       self.scroll[0]) / 10
-                    self.scroll[1] += (self.players[self.player_turn].rect().centery - self.display.get_height() / 2 -
-                                       self.scroll[1]) / 10
-            render_scroll = [
-                int(self.scroll[0]),
-                int(self.scroll[1])
-            ]
-
             # ==================== START EVENT ==================== #
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    if self.telemetry:
+                        self.telemetry.close()
                     pygame.quit()
                     sys.exit()
 
-                if event.type == pygame.USEREVENT:
-                    if self.is_playing():
-                        self.timer.countdown()
-                        if self.timer.is_finished():
-                            self.change_player_transition()
-
                 if event.type == pygame.KEYDOWN:
-                    if self.is_playing():
+                    if event.key == PROFILER_KEY:
+                        self.profiler.toggle()
+                    if self.is_human_playing():
                         if event.key == pygame.K_LEFT:
                             self.movement[self.player_turn][0] = True
                         if event.key == pygame.K_RIGHT:
@@ -262,7 +360,7 @@ class Game:
                             self.players[self.player_turn].charge_jump()
 
                 if event.type == pygame.KEYUP:
-                    if self.is_playing():
+                    if self.is_human_playing():
                         if event.key == pygame.K_LEFT:
                             self.movement[self.player_turn][0] = False
                         if event.key == pygame.K_RIGHT:
@@ -271,7 +369,7 @@ class Game:
                             self.players[self.player_turn].jump()
 
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    if self.is_playing():
+                    if self.is_human_playing():
                         if event.button == 1:
                             self.players[self.player_turn].charge_shoot()
                         if event.button == 3:
@@ -285,138 +383,31 @@ class Game:
                                 self.menu.running = True
 
                 if event.type == pygame.MOUSEBUTTONUP:
-                    if self.is_playing():
+                    if self.is_human_playing():
                         if event.button == 1:
-                            self.players[self.player_turn].shoot()
+                            self.players[self.player_turn].shoot(add_points(self.mouse_pos, self.scroll))
 
                 if event.type == pygame.MOUSEWHEEL:
-                    if self.is_playing():
+                    if self.is_human_playing():
                         self.players[self.player_turn].weapon += event.y
-                        self.players[self.player_turn].weapon %= 2
+                        self.players[self.player_turn].weapon %= len(WEAPONS)
 
             # ==================== END EVENT ==================== #
+            self.profiler.lap('events')
 
-            # Background
-            self.display.blit(pygame.transform.scale(self.assets['bg'], self.display.get_size()), (0, 0))
-
-            # Tilemap
-            self.tilemap.render(self.display, offset=render_scroll)
-
-            # Player
-            self.players[0].update(self.tilemap, movement=(self.movement[0][1] - self.movement[0][0], 0),
-                                   delta_time=self.delta_time)
-            self.players[1].update(self.tilemap, movement=(self.movement[1][1] - self.movement[1][0], 0),
-                                   delta_time=self.delta_time)
-            self.players[0].render(self.display, offset=render_scroll)
-            self.players[1].render(self.display, offset=render_scroll)
-
-            # Projectile
-            if self.projectile:
-                self.zoom = min(1.8, self.zoom + 0.1)
-                self.projectile.render(self.display, offset=render_scroll)
-                self.projectile.update(fps=FPS)
-                self.movement = [[False, False], [False, False]]
-                # Player death
-                self.check_player_death()
-            # Changing turn
-            elif self.changing_turn:
-                self.changing_turn_timer -= 1 / FPS
-                if self.changing_turn_timer <= 0:
-                    self.change_player_turn()
-            # Victory
-            elif self.winner is not None:
-                self.player_turn = self.winner
-                self.changing_turn = False
-                self.zoom = min(1.8, self.zoom + 0.1)
-            # Playing
-            else:
-                self.zoom = max(1, self.zoom - 0.1)
-
-                # Player death
-                if self.check_player_death():
-                    self.changing_turn = True
-
-                # Timer
-                self.timer.render(self.display, (10, 406))
-
-                # Weapon type
-                self.weapon_overlay.fill((0, 0, 0))
-                if self.players[self.player_turn].weapon == 0:
-                    weapon_img = self.assets["rocket"]
-                elif self.players[self.player_turn].weapon == 1:
-                    weapon_img = self.assets["grenade"]
-                else:
-                    weapon_img = self.assets["rocket"]
-                self.weapon_overlay.blit(pygame.transform.scale(weapon_img, (32, 32)), (16, 16))
-                self.weapon_overlay.blit(self.assets["weapon_frame_border"], (0, 0))
-                self.display.blit(self.weapon_overlay, (80, 406))
-
-                # Minimap
-                self.minimap.render(self.display, render_scroll)
-
-            # Wind
-            for particle in self.wind_particles:
-                particle[0] += self.wind[0] / 2
-                particle[1] += self.wind[1] / 2
-
-                # Redémarrer la particule si elle sort de l'écran
-                if particle[0] > SCREEN_SIZE[0]:
-                    particle[0] = 0
-                    particle[1] = randint(0, SCREEN_SIZE[1])
-                elif 0 > particle[0]:
-                    particle[0] = SCREEN_SIZE[0]
-                    particle[1] = randint(0, SCREEN_SIZE[1])
-
-                if particle[1] > SCREEN_SIZE[1]:
-                    particle[0] = randint(0, SCREEN_SIZE[0])
-                    particle[1] = 0
-                elif 0 > particle[1]:
-                    particle[0] = randint(0, SCREEN_SIZE[0])
-                    particle[1] = SCREEN_SIZE[1]
-
-                pygame.draw.line(self.display, (255, 255, 255), (particle[0], particle[1]), (particle[0] + self.wind[0] / 2, particle[1] + self.wind[1] / 2), 2)
-
-            # Particles
-            particles_to_kill = []
-            for i, particle in enumerate(self.particles):
-                kill = particle.update()
-                if kill:
-                    particles_to_kill.append(i)
-
-            particles = []
-            for i in range(len(self.particles)):
-                if i not in particles_to_kill:
-                    particles.append(self.particles[i])
-
-            for particule in self.particles:
-                particule.render(self.display, render_scroll)
-
-            self.particles = particles
-
-            # Screenshake
-            screenshake = ((random() * self.screenshake - self.screenshake / 2), (random() * self.screenshake - self.screenshake / 2))
-            if self.screenshake_timer > 0:
-                self.screenshake_timer -= 1 / FPS
-            else:
-                self.screenshake_timer = 0
-                self.screenshake = 0
-
-            # Display
-            screen_size = (SCREEN_SIZE[0] * self.zoom, SCREEN_SIZE[1] * self.zoom)
-            screen = pygame.transform.scale(self.display, screen_size)
-            dest = (
-                -((self.zoom - 1) * SCREEN_SIZE[0] / 2),
-                -((self.zoom - 1) * SCREEN_SIZE[1] / 2)
-            )
-            self.screen.blit(screen, (dest[0] + screenshake[0], dest[1] + screenshake[1]))
-
-            if self.winner is not None and not self.changing_turn:
-                if not self.victory_music:
-                    self.music.stop()
-                    self.sfx['victory'].play()
-                    self.victory_music = True
-                self.font.render(self.screen, f"Winner is player {self.winner + 1}", (SCREEN_SIZE[0] // 2, SCREEN_SIZE[1] // 2 - 120), center=True, bg=(0, 0, 0))
-                self.screen.blit(self.menu_assets['main_menu'], self.menu_rects['main_menu'])
+            # Bots search their shot within a time budget per frame
+            for bot in self.bots:
+                bot.update()
+            self.profiler.lap('bots')
+
+            while accumulator >= 1 / FPS:
+                self.step()
+                accumulator -= 1 / FPS
+            self.interpolation = accumulator * FPS
+
+            self.render()
 
             pygame.display.update()
+            self.profiler.lap('display')
             self.clock.tick(FPS)
+            self.profiler.lap('tick')
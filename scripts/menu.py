@@ -2,7 +2,8 @@ import pygame
 import sys
 
 from scripts.core.constants import SCREEN_SIZE
-from scripts.core.utils import load_image, get_map_names, scale_img_keep_aspect_ratio, SFX_PATH
+from scripts.core.assets import Assets
+from scripts.core.utils import get_map_names, scale_img_keep_aspect_ratio, SFX_PATH
 from scripts.core.font import Font
 
 class Menu:
@@ -11,11 +12,12 @@ class Menu:
         self.running = True
         scale_factor = 3
         self.font = Font('data/fonts/large_font.png', scale=scale_factor)
+        assets = Assets()
         self.assets = {
-            'bg': load_image('background.png'),
-            'play': pygame.transform.scale_by(load_image('menu/play.png', colorkey=None, alpha=True), scale_factor),
-            'previous': pygame.transform.scale_by(load_image('menu/previous.png', colorkey=None, alpha=True), scale_factor),
-            'next': pygame.transform.scale_by(load_image('menu/next.png', colorkey=None, alpha=True), scale_factor),
+            'bg': pygame.transform.scale(assets.image('background.png'), self.game.screen.get_size()),
+            'play': pygame.transform.scale_by(assets.image('menu/play.png', colorkey=None, alpha=True), scale_factor),
+            'previous': pygame.transform.scale_by(assets.image('menu/previous.png', colorkey=None, alpha=True), scale_factor),
+            'next': pygame.transform.scale_by(assets.image('menu/next.png', colorkey=None, alpha=True), scale_factor),
         }
         self.menus = {
             'main': {
@@ -31,20 +33,22 @@ class Menu:
             },
         }
         self.current_menu = 'main'
-        self.click_sound = pygame.mixer.Sound(SFX_PATH + 'jump.wav')
-        self.click_sound.set_volume(0.1)
+        self.click_sound = assets.sound(SFX_PATH + 'jump.wav', 0.1)
 
     def load_maps(self):
+        self.menus['map']['map_list'] = []
         for i, map_name in enumerate(get_map_names()):
             self.menus['map']['map_list'].append({
                 'name': map_name,
-                'thumbnail': scale_img_keep_aspect_ratio(load_image(f'../maps/{map_name}/thumbnail.png', colorkey=None), 640, 480),
+                'thumbnail': scale_img_keep_aspect_ratio(Assets().image(f'../maps/{map_name}/thumbnail.png', colorkey=None), 640, 480),
             })
             self.menus['map']['current_map'] = 0
 
     def run(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if self.game.telemetry:
+                    self.game.telemetry.close()
                 pygame.quit()
                 sys.exit()
 
@@ -75,7 +79,7 @@ class Menu:
 
 
         # Background
-        self.game.screen.blit(pygame.transform.scale(self.assets['bg'], self.game.screen.get_size()), (0, 0))
+        self.game.screen.blit(self.assets['bg'], (0, 0))
 
         # Main menu
         if self.current_menu == 'main':
@@ -0,0 +1,253 @@
+import math
+from random import Random
+
+import numpy as np
+
+from scripts.core.constants import FPS, TURN_SECONDS, MAX_WIND, TEAMS, TEAM_WORMS
+from scripts.core.spatial_grid import SpatialGrid
+from scripts.core.utils import load_map
+from scripts.entities.player import Player
+from scripts.features.wind import WindField
+
+WORM_SPREAD = 5  # tiles between the worms of a team, around its spawner
+SPAWN_SEARCH = (10, 30)  # tiles above and below the spawner searched for the ground of the other worms
+MAX_SPAWN_POINTS = 256
+WIND_BATCH = 12  # projectiles from which their wind is sampled at once, below it wind_at per projectile is cheaper
+
+
+# Stands in for the Profiler of the Game, which needs pygame: the laps of a headless simulation do nothing
+class NullProfiler:
+    def lap(self, phase):
+        pass
+
+
+# World state, physics, turns and weapons, without display, mixer or assets
+# Rendering and audio subscribe to the emitted events, see Game
+class Simulation:
+    def __init__(self, seed=None, max_wind=MAX_WIND):
+        self.rng = Random(seed)
+        self.max_wind = max_wind
+        self.assets = None  # entities skip their animations when there are no assets
+        self.listeners = []
+        self.tilemap = None
+        self.profiler = NullProfiler()  # replaced by the Game
+
+    # ===== EVENTS =====
+    def subscribe(self, listener):
+        """ listener(event, data) is called for every event, data being a dict """
+        self.listeners.append(listener)
+
+    def emit(self, event, **data):
+        for listener in self.listeners:
+            listener(event, data)
+
+    # ===== MATCH =====
+    def load_level(self, map, pixel_terrain=False, team_worms=TEAM_WORMS):
+        # Players are the worms of every team, Player.number being their team
+        self.players = [Player(self, (0, 0), (8, 15), team) for team in range(TEAMS) for _ in range(team_worms)]
+        self.dead = set()
+        self.winner = None
+        self.projectiles = []
+        self.movement = [[False, False] for _ in self.players]
+        self.player_turn = 0
+        self.worm_turns = [1] + [0] * (TEAMS - 1)  # turns played by each team, to cycle through its worms
+        self.changing_turn = False
+        self.changing_turn_timer = 2
+        self.turn_seconds = TURN_SECONDS
+        self.timer_steps = 0
+        self.steps = 0
+        self.turns = 0
+        self.wind = [self.rng.randint(-self.max_wind, self.max_wind + 1),
+                     self.rng.randint(-self.max_wind, self.max_wind + 1)]
+
+        self.tilemap = load_map(self, map)
+        spawners = {}
+        for spawner in self.tilemap.extract([('spawners', 0), ('spawners', 1)]):
+            spawners[spawner['variant']] = spawner['pos']
+        for team, spawner in spawners.items():
+            points = self.spawn_points(spawner)
+            for player in self.players:
+                if player.number == team:
+                    player.pos = next(points)
+        for player in self.players:
+            player.prev_pos = list(player.pos)
+        if pixel_terrain:
+            self.tilemap.bake_terrain()
+        self.wind_field = WindField(self.wind, self.tilemap, self.max_wind,
+                                    np.random.default_rng(self.rng.getrandbits(64)))
+        self.grid = SpatialGrid()
+        self.update_grid()
+
+    def spawn_points(self, spawner):
+        """ The spawner, then the ground on alternating sides of it, WORM_SPREAD tiles apart, never twice the same point """
+        yield list(spawner)
+        tile_size = self.tilemap.tile_size
+        left = self.tilemap.grid_origin[0] * tile_size
+        right = left + self.tilemap.grid_width * tile_size
+        column = lambda i: spawner[0] + (i + 1) // 2 * WORM_SPREAD * tile_size * (1 if i % 2 else -1)
+        no_ground = []
+        for i in range(1, MAX_SPAWN_POINTS):
+            x = column(i)
+            # First free to solid transition of the column, from a few tiles above the spawner
+            y = spawner[1] - SPAWN_SEARCH[0] * tile_size
+            free = False
+            while left <= x + 4 < right and y < spawner[1] + SPAWN_SEARCH[1] * tile_size:
+                solid = self.tilemap.is_pos_in_tile((x + 4, y))
+                if free and solid:
+                    yield [x, y // tile_size * tile_size - 15]
+                    break
+                free = not solid
+                y += tile_size
+            else:
+                no_ground.append(x)
+        # Then the free air of the columns without ground, at the spawner height: the worms fall from there
+        no_ground.sort(key=lambda x: not left <= x + 4 < right)
+        for x in no_ground:
+            if not self.tilemap.is_pos_in_tile((x + 4, spawner[1])):
+                yield [x, spawner[1]]
+        i = MAX_SPAWN_POINTS
+        while True:
+            yield [column(i), spawner[1]]
+            i += 1
+
+    def is_playing(self):
+        return not (self.projectiles or self.changing_turn or self.winner is not None)
+
+    def team_worms(self, team):
+        """ Indexes in self.players of the living worms of the team """
+        return [i for i, player in enumerate(self.players) if player.number == team and player.health > 0]
+
+    def wind_at(self, pos):
+        """ Wind at a world position, self.wind being its average over the map """
+        return self.wind_field.at(pos)
+
+    def add_projectile(self, projectile):
+        self.projectiles.append(projectile)
+
+    def remove_projectile(self, projectile):
+        self.projectiles.remove(projectile)
+
+    def change_player_transition(self):
+        self.changing_turn_timer = 2
+        self.changing_turn = True
+        self.players[self.player_turn].charge_shooting = False
+        self.movement = [[False, False] for _ in self.players]
+
+    def change_player_turn(self):
+        self.changing_turn_timer = 2
+        self.changing_turn = False
+        self.turn_seconds = TURN_SECONDS
+        self.timer_steps = 0
+        team = (self.players[self.player_turn].number + 1) % TEAMS
+        worms = self.team_worms(team)
+        if worms:
+            self.player_turn = worms[self.worm_turns[team] % len(worms)]
+            self.worm_turns[team] += 1
+        self.turns += 1
+        self.emit('turn', player_turn=self.player_turn)
+
+    # ===== COLLISIONS =====
+    def update_grid(self):
+        """ Bucket the living worms in the broad-phase grid, after they moved """
+        self.grid.clear()
+        for player in self.players:
+            if player.health > 0:
+                self.grid.insert(player, (player.pos[0], player.pos[1], player.size[0], player.size[1]))
+
+    def worm_hit(self, start, end, ignore=None):
+        """ First point of the segment inside a living worm, or None """
+        hit = None
+        for player in self.grid.query_segment(start, end):
+            if player is ignore or player.health <= 0:
+                continue
+            clipped = player.rect().clipline(start, end)
+            if clipped:
+                point = clipped[0]
+                if hit is None or math.dist(start, point) < math.dist(start, hit):
+                    hit = point
+        return hit
+
+    def damage_player(self, pos, radius, damage):
+        r = radius * self.tilemap.tile_size
+        for player in self.grid.query_circle(pos, r):
+            # Worms killed earlier in the step are still in the grid until the next update_grid
+            if player.health <= 0:
+                continue
+            v = (player.pos[0] - pos[0]), (player.pos[1] - pos[1])
+            if v[0] ** 2 + v[1] ** 2 <= r ** 2:
+                l = math.sqrt(v[0]**2 + v[1]**2)
+                ratio = 1 - (l / r)
+                player.health -= damage * ratio
+                self.emit('hurt', player=player, damage=damage * ratio)
+
+    def kill_player(self, player):
+        player.health = 0
+        self.dead.add(player)
+        self.emit('death', player=player)
+
+    def check_player_death(self):
+        """ Kill the worms out of health and find the winner, returns True if the playing worm died """
+        for player in self.players:
+            if player.health <= 0 and player not in self.dead:
+                self.kill_player(player)
+        if self.winner is None:
+            teams = {player.number for player in self.players if player.health > 0}
+            if len(teams) <= 1:
+                self.winner = teams.pop() if teams else (self.players[self.player_turn].number + 1) % TEAMS
+        return self.players[self.player_turn].health <= 0
+
+    # ===== STEP =====
+    def step(self):
+        """ Advance the world by one fixed step of 1 / FPS seconds """
+        self.steps += 1
+        self.wind_field.step(1 / FPS)
+
+        # Turn timer, counted in steps
+        if self.is_playing():
+            self.timer_steps += 1
+            if self.timer_steps >= FPS:
+                self.timer_steps = 0
+                self.turn_seconds -= 1
+                self.emit('countdown', seconds=self.turn_seconds)
+                if self.turn_seconds <= 0:
+                    self.change_player_transition()
+        self.profiler.lap('simulation')
+
+        # Player
+        for player, movement in zip(self.players, self.movement):
+            player.update(self.tilemap, movement=(movement[1] - movement[0], 0))
+        self.update_grid()
+        self.profiler.lap('players')
+
+        # Projectile
+        if self.projectiles:
+            # The wind under every projectile in one sample, the same values they would each get from wind_at
+            projectiles = list(self.projectiles)
+            winds = [None] * len(projectiles)
+            if len(projectiles) >= WIND_BATCH:
+                winds = self.wind_field.sample([projectile.pos for projectile in projectiles]).tolist()
+            for projectile, wind in zip(projectiles, winds):
+                projectile.update(fps=FPS, wind=wind)
+            self.profiler.lap('projectiles')
+            self.movement = [[False, False] for _ in self.players]
+            # Player death
+            self.check_player_death()
+            # The turn ends once every projectile exploded
+            if not self.projectiles:
+                self.change_player_transition()
+        # Changing turn
+        elif self.changing_turn:
+            self.changing_turn_timer -= 1 / FPS
+            if self.changing_turn_timer <= 0:
+                self.change_player_turn()
+        # Victory
+        elif self.winner is not None:
+            worms = self.team_worms(self.winner)
+            if worms:
+                self.player_turn = worms[0]
+            self.changing_turn = False
+        # Playing
+        else:
+            # Player death
+            if self.check_player_death() or self.winner is not None:
+                self.changing_turn = True